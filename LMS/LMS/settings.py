@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.custom_middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -55,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'core.custom_middleware.TimeoutMiddleware',
+    'core.custom_middleware.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'LMS.urls'
@@ -92,6 +94,85 @@ DATABASES = {
 
 MAX_VIDEO_FILE_SIZE_MB = 16
 
+# seconds a request may spend before its database work is cancelled (core/custom_middleware.py);
+# views can override it with a `request_timeout` class attribute
+REQUEST_TIMEOUT = int(os.getenv('REQUEST_TIMEOUT', 20))
+
+# request metrics served at /lms/metrics (core/metrics.py); with several worker processes
+# point METRICS_DIR at a directory shared by them, emptied on every full restart
+METRICS_DIR = os.getenv('METRICS_DIR')
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+# who may read /lms/metrics: requests with "Authorization: Bearer METRICS_TOKEN", or from one
+# of the comma separated METRICS_ALLOWED_IPS; with neither set the endpoint answers 403
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+
+# per-request query budgets (core/query_budget.py): 'off', 'log' reports views over their
+# budget or repeating one query more than QUERY_REPEAT_LIMIT times, 'raise' fails the request
+QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'log' if DEBUG else 'off')
+QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', 20))
+QUERY_REPEAT_LIMIT = int(os.getenv('QUERY_REPEAT_LIMIT', 3))
+
+# shared cache for the dashboard data and its version counters (core/dashboard_cache.py); the
+# local-memory default is per process, use e.g. django.core.cache.backends.redis.RedisCache
+# with CACHE_LOCATION=redis://... when running several workers
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+# seconds a dashboard entry is fresh, then how long it may still be served while one request
+# recomputes it, and how long that request holds the recompute lock
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 60))
+DASHBOARD_CACHE_STALE_TTL = int(os.getenv('DASHBOARD_CACHE_STALE_TTL', 600))
+DASHBOARD_CACHE_LOCK_TIMEOUT = int(os.getenv('DASHBOARD_CACHE_LOCK_TIMEOUT', 30))
+# on a miss, how long other requests poll (every DASHBOARD_CACHE_POLL_INTERVAL seconds) for the
+# entry the lock holder is computing before computing it themselves
+DASHBOARD_CACHE_WAIT_TIMEOUT = float(os.getenv('DASHBOARD_CACHE_WAIT_TIMEOUT', 5))
+DASHBOARD_CACHE_POLL_INTERVAL = float(os.getenv('DASHBOARD_CACHE_POLL_INTERVAL', 0.05))
+
+# score recomputation queue (backend ScoreJob, `manage.py run_score_jobs`): a failed job is retried
+# up to SCORE_JOB_MAX_ATTEMPTS times, SCORE_JOB_RETRY_DELAY * 2 ** (attempt - 1) seconds apart, and a
+# running job its worker has not finished within SCORE_JOB_LEASE_TIMEOUT seconds is run again
+SCORE_JOB_MAX_ATTEMPTS = int(os.getenv('SCORE_JOB_MAX_ATTEMPTS', 5))
+SCORE_JOB_RETRY_DELAY = int(os.getenv('SCORE_JOB_RETRY_DELAY', 30))
+SCORE_JOB_LEASE_TIMEOUT = int(os.getenv('SCORE_JOB_LEASE_TIMEOUT', 600))
+
+# seconds a role's resolved resource ids stay cached in each worker (core/privilege_resolver.py)
+PRIVILEGE_CACHE_TTL = int(os.getenv('PRIVILEGE_CACHE_TTL', 300))
+
+# per quiz answer keys used for grading, cached in each worker (core/answer_key_cache.py); entries
+# are keyed by the quiz content version, so the TTL and size only bound memory
+QUIZ_ANSWER_KEY_CACHE_TTL = int(os.getenv('QUIZ_ANSWER_KEY_CACHE_TTL', 3600))
+QUIZ_ANSWER_KEY_CACHE_SIZE = int(os.getenv('QUIZ_ANSWER_KEY_CACHE_SIZE', 500))
+
+# identity microservice used by core/custom_authentication.py to resolve bearer tokens
+# (run `python manage.py run_identity_stub --token TOKEN=EMAIL` for a local stand-in)
+IDENTITY_SERVICE_URL = os.getenv('IDENTITY_SERVICE_URL', 'http://microservice1/api/get_user/')
+IDENTITY_SERVICE_TIMEOUT = (
+    float(os.getenv('IDENTITY_SERVICE_CONNECT_TIMEOUT', 2)),
+    float(os.getenv('IDENTITY_SERVICE_READ_TIMEOUT', 5)),
+)
+IDENTITY_SERVICE_POOL_SIZE = int(os.getenv('IDENTITY_SERVICE_POOL_SIZE', 20))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv('AUTH_TOKEN_CACHE_TTL', 60))
+AUTH_INVALID_TOKEN_CACHE_TTL = int(os.getenv('AUTH_INVALID_TOKEN_CACHE_TTL', 30))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+
+# local verification of signed access tokens (core.custom_authentication.JWTAuthentication);
+# configure either a JWKS source or a shared HMAC signing key
+JWT_JWKS_URL = os.getenv('JWT_JWKS_URL')
+JWT_JWKS_FILE = os.getenv('JWT_JWKS_FILE')
+JWT_JWKS_REFRESH_INTERVAL = int(os.getenv('JWT_JWKS_REFRESH_INTERVAL', 300))
+JWT_SIGNING_KEY = os.getenv('JWT_SIGNING_KEY')
+JWT_ALGORITHMS = os.getenv('JWT_ALGORITHMS', 'HS256' if JWT_SIGNING_KEY else 'RS256').split(',')
+JWT_AUDIENCE = os.getenv('JWT_AUDIENCE')
+JWT_ISSUER = os.getenv('JWT_ISSUER')
+JWT_LEEWAY = int(os.getenv('JWT_LEEWAY', 10))
+JWT_USER_ID_CLAIM = os.getenv('JWT_USER_ID_CLAIM', 'user_id')
+JWT_ROLE_CLAIM = os.getenv('JWT_ROLE_CLAIM', 'role')
+JWT_CUSTOMER_CLAIM = os.getenv('JWT_CUSTOMER_CLAIM', 'customer')
+
 
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
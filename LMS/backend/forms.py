@@ -9,9 +9,9 @@ from backend.models.coremodels import User
 from backend.models.allmodels import Question, Quiz, Choice
 
 class QuestionForm(forms.Form):
-    def __init__(self, question, *args, **kwargs):
+    def __init__(self, question, *args, quiz=None, **kwargs):
         super(QuestionForm, self).__init__(*args, **kwargs)
-        choice_list = [x for x in question.get_choices_list()]
+        choice_list = [x for x in question.get_choices_list(quiz)]
         self.fields["answers"] = forms.ChoiceField(
             choices=choice_list, widget=RadioSelect
         )
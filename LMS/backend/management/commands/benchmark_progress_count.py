@@ -0,0 +1,112 @@
+import random
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from backend.models.allmodels import Course, CourseCompletionStatusPerUser, CourseEnrollment
+from backend.models.coremodels import Customer, Role, User
+from backend.views.clientadmindashboard import ProgressCountView
+
+
+def legacy_count_progress(customer_id):
+    """ProgressCountView's previous implementation, kept for comparison."""
+    active_enrolled = CourseEnrollment.objects.filter(user__customer__id=customer_id, active=True).values_list('user', flat=True).distinct()
+    active_enrolled_ids = list(active_enrolled.values_list('user', flat=True))
+    if not active_enrolled_ids:
+        return None
+    records = CourseCompletionStatusPerUser.objects.filter(active=True, enrolled_user__in=active_enrolled_ids, deleted_at__isnull=True)
+    active_course_ids = records.values_list('course', flat=True).distinct()
+    active_courses = Course.objects.filter(id__in=active_course_ids, active=True, deleted_at__isnull=True)
+    progress_data = []
+    for course in active_courses:
+        counts = {
+            status: records.filter(course=course, status=status, active=True, enrolled_user__customer__id=customer_id).count()
+            for status in ["completed", "in_progress", "not_started"]
+        }
+        progress_data.append({
+            'course_title': course.title,
+            'completion_count': counts['completed'],
+            'in_progress_count': counts['in_progress'],
+            'not_started_count': counts['not_started'],
+        })
+    return progress_data
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the client admin progress counts on a synthetic customer. The data is created "
+        "in a transaction that is rolled back, nothing is left behind."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=50000)
+        parser.add_argument('--courses', type=int, default=20)
+        parser.add_argument('--courses-per-user', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--skip-legacy', action='store_true', help="only time the current implementation")
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            customer_id = self.create_dataset(rng, options)
+            implementations = [('current', ProgressCountView.count_progress)]
+            if not options['skip_legacy']:
+                implementations.append(('legacy', legacy_count_progress))
+
+            results = {}
+            for name, count_progress in implementations:
+                timings = []
+                for _ in range(options['repeat']):
+                    with CaptureQueriesContext(connection) as queries:
+                        started_at = time.perf_counter()
+                        results[name] = count_progress(customer_id)
+                        timings.append(time.perf_counter() - started_at)
+                self.stdout.write(
+                    f"{name:>8}: median {statistics.median(timings) * 1000:.1f} ms, "
+                    f"min {min(timings) * 1000:.1f} ms, {len(queries)} queries"
+                )
+            if len(results) == 2 and results['current'] != results['legacy']:
+                self.stderr.write(self.style.ERROR("current and legacy results differ"))
+            transaction.set_rollback(True)
+
+    def create_dataset(self, rng, options):
+        started_at = time.perf_counter()
+        tag = uuid.uuid4().hex[:8]
+        customer = Customer.objects.create(name=f'benchmark {tag}', email=f'benchmark-{tag}@example.invalid')
+        role = Role.objects.create(name='benchmark', customer=customer)
+        Course.objects.bulk_create(
+            [Course(title=f'benchmark {tag} course {i}', active=True) for i in range(options['courses'])]
+        )
+        course_ids = list(Course.objects.filter(title__startswith=f'benchmark {tag} ').values_list('id', flat=True))
+        User.objects.bulk_create(
+            [
+                User(first_name='benchmark', email=f'benchmark-{tag}-{i}@example.invalid', customer=customer, created_by=role)
+                for i in range(options['users'])
+            ],
+            batch_size=5000,
+        )
+        user_ids = list(User.objects.filter(customer=customer).values_list('id', flat=True))
+
+        enrollments = []
+        status_records = []
+        statuses = [choice for choice, _ in CourseCompletionStatusPerUser.STATUS_CHOICES]
+        for user_id in user_ids:
+            for course_id in rng.sample(course_ids, min(options['courses_per_user'], len(course_ids))):
+                # about one enrollment in ten is inactive
+                enrollments.append(CourseEnrollment(user_id=user_id, course_id=course_id, active=rng.random() > 0.1))
+                status_records.append(
+                    CourseCompletionStatusPerUser(enrolled_user_id=user_id, course_id=course_id, status=rng.choice(statuses))
+                )
+        CourseEnrollment.objects.bulk_create(enrollments, batch_size=5000)
+        CourseCompletionStatusPerUser.objects.bulk_create(status_records, batch_size=5000)
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE users, course_enrollment, course_completion_status")
+        self.stdout.write(
+            f"Created customer {customer.id} with {len(user_ids)} users, {len(enrollments)} enrollments "
+            f"in {time.perf_counter() - started_at:.1f}s"
+        )
+        return customer.id
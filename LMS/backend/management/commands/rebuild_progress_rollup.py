@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from backend.models.allmodels import CourseProgressRollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild the course progress rollup used by the dashboards from the completion status records."
+
+    def handle(self, *args, **options):
+        rows = CourseProgressRollup.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt course progress rollup: {rows} row(s)."))
@@ -0,0 +1,166 @@
+import multiprocessing
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from backend.models.allmodels import (
+    Course,
+    CourseCompletionStatusPerUser,
+    QuizAttemptHistory,
+    QuizScore,
+)
+from backend.models.coremodels import User
+
+
+def write_scores(course_id, scores, dry_run):
+    """
+    Write the scores that differ from the stored ones and the completion statuses they imply.
+    Returns (scores changed, statuses changed); with dry_run nothing is written.
+    """
+    user_ids = {user_id for _, user_id in scores}
+    stored_scores = {
+        (course_id, row[0]): tuple(row[1:])
+        for row in QuizScore.objects.filter(course_id=course_id, enrolled_user_id__in=user_ids).values_list(
+            'enrolled_user_id', 'completed_quiz_count', 'total_quizzes_per_course', 'total_score_per_course'
+        )
+    }
+    changed_scores = {pair: score for pair, score in scores.items() if stored_scores.get(pair) != score}
+    stored_statuses = {
+        (course_id, user_id): status
+        for user_id, status in CourseCompletionStatusPerUser.objects.filter(
+            course_id=course_id, enrolled_user_id__in=user_ids
+        ).values_list('enrolled_user_id', 'status')
+    }
+    changed_statuses = {}
+    for pair, score in scores.items():
+        status = CourseCompletionStatusPerUser.derive_status(score[0], score[1])
+        if stored_statuses.get(pair) != status:
+            changed_statuses[pair] = status
+    if not dry_run:
+        with transaction.atomic():
+            QuizScore.objects.save_scores(changed_scores)
+            CourseCompletionStatusPerUser.objects.set_statuses(changed_statuses)
+    return len(changed_scores), len(changed_statuses)
+
+
+def rebuild_course(course_id, customer_id=None, dry_run=False, chunk_size=2000):
+    """
+    Rebuild the scores and statuses of one course from its completed attempts, streamed in
+    (user, quiz, newest first) order with a server-side cursor so memory stays flat. Scores
+    are written every `chunk_size` users. Returns a dict of counts.
+    """
+    started_at = time.perf_counter()
+    total_quizzes = QuizScore.objects.count_course_quizzes([course_id]).get(course_id, 0)
+    attempts = QuizAttemptHistory.objects.filter(course_id=course_id, complete=True)
+    # enrolled users and existing scores, the same pairs compute_scores covers
+    pending_users = {user_id for _, user_id in QuizScore.objects.get_score_pairs(course_ids=[course_id])}
+    if customer_id is not None:
+        attempts = attempts.filter(enrolled_user__customer_id=customer_id)
+        pending_users &= set(User.objects.filter(customer_id=customer_id).values_list('id', flat=True))
+    score_users = frozenset(pending_users)
+    rows = (
+        attempts.order_by('enrolled_user_id', 'quiz_id', '-created_at', '-id')
+        .values_list('enrolled_user_id', 'quiz_id', 'current_score', 'question_list_order')
+        .iterator(chunk_size=chunk_size)
+    )
+
+    counts = {'course_id': course_id, 'attempts': 0, 'scores': 0, 'scores_changed': 0, 'statuses_changed': 0}
+    scores = {}
+
+    def flush():
+        scores_changed, statuses_changed = write_scores(course_id, scores, dry_run)
+        counts['scores'] += len(scores)
+        counts['scores_changed'] += scores_changed
+        counts['statuses_changed'] += statuses_changed
+        scores.clear()
+
+    current_user, last_quiz, completed, fraction_total = None, None, 0, 0
+    for user_id, quiz_id, current_score, question_list_order in rows:
+        counts['attempts'] += 1
+        if user_id not in score_users:
+            continue
+        if user_id != current_user:
+            if current_user is not None:
+                scores[(course_id, current_user)] = QuizScore.objects.build_score(completed, total_quizzes, fraction_total)
+                pending_users.discard(current_user)
+                if len(scores) >= chunk_size:
+                    flush()
+            current_user, last_quiz, completed, fraction_total = user_id, None, 0, 0
+        if quiz_id == last_quiz:
+            # an older attempt of a quiz already counted
+            continue
+        last_quiz = quiz_id
+        completed += 1
+        question_count = len(question_list_order)
+        if question_count:
+            fraction_total += current_score / question_count
+    if current_user is not None:
+        scores[(course_id, current_user)] = QuizScore.objects.build_score(completed, total_quizzes, fraction_total)
+        pending_users.discard(current_user)
+    # the pairs without a completed attempt
+    for user_id in pending_users:
+        scores[(course_id, user_id)] = QuizScore.objects.build_score(0, total_quizzes, 0)
+        if len(scores) >= chunk_size:
+            flush()
+    if scores:
+        flush()
+    counts['seconds'] = time.perf_counter() - started_at
+    return counts
+
+
+def rebuild_course_task(args):
+    try:
+        return rebuild_course(*args)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild QuizScore and CourseCompletionStatusPerUser from the quiz attempt history, one "
+        "course per task over a pool of worker processes. Only rows that differ are written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, help="only this course")
+        parser.add_argument('--customer', type=int, help="only the users of this customer")
+        parser.add_argument('--processes', type=int, default=1, help="worker processes (default 1)")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="attempts fetched / users written at a time")
+        parser.add_argument('--dry-run', action='store_true', help="count what would change without writing")
+
+    def handle(self, *args, **options):
+        if options['course'] is not None:
+            if not Course.objects.filter(id=options['course']).exists():
+                raise CommandError(f"Course {options['course']} does not exist")
+            course_ids = [options['course']]
+        else:
+            course_ids = list(Course.objects.order_by('id').values_list('id', flat=True))
+        tasks = [(course_id, options['customer'], options['dry_run'], options['chunk_size']) for course_id in course_ids]
+
+        started_at = time.perf_counter()
+        totals = {'attempts': 0, 'scores': 0, 'scores_changed': 0, 'statuses_changed': 0}
+        if options['processes'] > 1:
+            # forked workers must not share the parent's database connection
+            connections.close_all()
+            with multiprocessing.Pool(options['processes']) as pool:
+                self.report(pool.imap_unordered(rebuild_course_task, tasks), len(tasks), totals, started_at)
+        else:
+            self.report(map(lambda task: rebuild_course(*task), tasks), len(tasks), totals, started_at)
+
+        elapsed = time.perf_counter() - started_at
+        verb = "would change" if options['dry_run'] else "changed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(tasks)} course(s) from {totals['attempts']} attempt(s) in {elapsed:.1f}s "
+            f"({totals['attempts'] / elapsed if elapsed else 0:.0f} attempts/s): {totals['scores']} score(s), "
+            f"{verb} {totals['scores_changed']} score(s) and {totals['statuses_changed']} status(es)."
+        ))
+
+    def report(self, results, task_count, totals, started_at):
+        for done, counts in enumerate(results, start=1):
+            for key in totals:
+                totals[key] += counts[key]
+            elapsed = time.perf_counter() - started_at
+            self.stdout.write(
+                f"[{done}/{task_count}] course {counts['course_id']}: {counts['attempts']} attempt(s), "
+                f"{counts['scores']} score(s), {counts['scores_changed']} changed in {counts['seconds']:.1f}s "
+                f"- {totals['attempts'] / elapsed if elapsed else 0:.0f} attempts/s overall"
+            )
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from backend.models.allmodels import Course, CourseCompletionStatusPerUser, QuizScore
+
+
+class Command(BaseCommand):
+    help = (
+        "Realign QuizScore rows and completion statuses with the quiz attempt history. Quiz "
+        "completions update both incrementally; this fixes whatever drifted, one course at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--course', type=int, action='append', dest='course_ids', help="only this course (repeatable)")
+        parser.add_argument('--dry-run', action='store_true', help="report the drift without fixing it")
+
+    def handle(self, *args, **options):
+        course_ids = options['course_ids'] or list(Course.objects.order_by('id').values_list('id', flat=True))
+        totals = {'scores': 0, 'scores_fixed': 0, 'statuses_fixed': 0}
+        for course_id in course_ids:
+            with transaction.atomic():
+                scores_fixed, statuses_fixed, score_count = self.reconcile_course(course_id, options['dry_run'])
+            totals['scores'] += score_count
+            totals['scores_fixed'] += scores_fixed
+            totals['statuses_fixed'] += statuses_fixed
+            if scores_fixed or statuses_fixed:
+                self.stdout.write(f"course {course_id}: {scores_fixed} score(s), {statuses_fixed} status(es) drifted")
+
+        verb = "would fix" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {totals['scores']} score(s) in {len(course_ids)} course(s), {verb} "
+            f"{totals['scores_fixed']} score(s) and {totals['statuses_fixed']} status(es)."
+        ))
+
+    def reconcile_course(self, course_id, dry_run):
+        pairs = QuizScore.objects.get_score_pairs(course_ids=[course_id])
+        if not pairs:
+            return 0, 0, 0
+        expected = QuizScore.objects.compute_scores(pairs, filter_users=False)
+        stored = {
+            (row[0], row[1]): tuple(row[2:])
+            for row in QuizScore.objects.filter(course_id=course_id).values_list(
+                'course_id', 'enrolled_user_id', 'completed_quiz_count', 'total_quizzes_per_course', 'total_score_per_course'
+            )
+        }
+        drifted_scores = {pair: scores for pair, scores in expected.items() if stored.get(pair) != scores}
+
+        # only existing status records are realigned, creating them is up to enrollment
+        drifted_statuses = {}
+        for user_id, status in CourseCompletionStatusPerUser.objects.filter(course_id=course_id).values_list(
+            'enrolled_user_id', 'status'
+        ):
+            scores = expected.get((course_id, user_id))
+            if scores is None:
+                continue
+            expected_status = CourseCompletionStatusPerUser.derive_status(scores[0], scores[1])
+            if status != expected_status:
+                drifted_statuses[(course_id, user_id)] = expected_status
+
+        if not dry_run:
+            QuizScore.objects.save_scores(drifted_scores)
+            CourseCompletionStatusPerUser.objects.set_statuses(drifted_statuses)
+        return len(drifted_scores), len(drifted_statuses), len(pairs)
@@ -0,0 +1,38 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from core.identity_stub import IdentityStubServer
+
+
+class Command(BaseCommand):
+    help = "Run a local stub of the identity microservice so bearer-token authentication can be exercised offline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--path', default='/api/get_user/')
+        parser.add_argument(
+            '--token', action='append', default=[], metavar='TOKEN=USERNAME',
+            help="token accepted by the stub and the username it resolves to (repeatable)",
+        )
+        parser.add_argument('--tokens-file', help="JSON file with a {token: username} mapping")
+
+    def handle(self, *args, **options):
+        tokens = {}
+        if options['tokens_file']:
+            with open(options['tokens_file']) as tokens_file:
+                tokens.update(json.load(tokens_file))
+        for item in options['token']:
+            token, separator, username = item.partition('=')
+            if not separator or not token or not username:
+                raise CommandError(f"--token expects TOKEN=USERNAME, got '{item}'")
+            tokens[token] = username
+
+        server = IdentityStubServer((options['host'], options['port']), tokens=tokens, path=options['path'])
+        self.stdout.write(f"Identity stub serving {len(tokens)} token(s) at {server.url}")
+        self.stdout.write("Point IDENTITY_SERVICE_URL at it. Quit with CONTROL-C.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,70 @@
+import datetime
+import logging
+import multiprocessing
+import signal
+import time
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+from django.utils import timezone
+from backend.models.allmodels import ScoreJob
+
+logger = logging.getLogger(__name__)
+
+
+def work(batch_size, poll_interval, once):
+    """Worker loop: run batches until stopped, sleeping while the queue is empty."""
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    try:
+        while not stopping:
+            try:
+                claimed = ScoreJob.objects.run_batch(batch_size)
+            except DatabaseError:
+                # e.g. a dropped connection: reconnect on the next batch
+                logger.exception("score job batch failed")
+                connections.close_all()
+                claimed = 0
+            if not claimed:
+                if once:
+                    break
+                time.sleep(poll_interval)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued score recomputation jobs (ScoreJob). Start it under a process supervisor; "
+        "SIGTERM lets every worker finish its current batch before exiting."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="worker processes (default 1)")
+        parser.add_argument('--batch-size', type=int, default=100, help="jobs claimed at a time per worker")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="exit once the queue is empty")
+        parser.add_argument('--purge-days', type=int, default=7, help="delete jobs finished more than this many days ago")
+
+    def handle(self, *args, **options):
+        purged = ScoreJob.objects.purge(timezone.now() - datetime.timedelta(days=options['purge_days']))
+        if purged:
+            self.stdout.write(f"Purged {purged} finished job(s).")
+        worker_args = (options['batch_size'], options['poll_interval'], options['once'])
+        if options['processes'] <= 1:
+            work(*worker_args)
+            return
+
+        # forked workers must not share the parent's database connection
+        connections.close_all()
+        workers = [multiprocessing.Process(target=work, args=worker_args) for _ in range(options['processes'])]
+        for worker in workers:
+            worker.start()
+        signal.signal(signal.SIGTERM, lambda signum, frame: [worker.terminate() for worker in workers])
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+                worker.join()
+        self.stdout.write(self.style.SUCCESS(f"{len(workers)} worker(s) stopped."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from backend.models.allmodels import CourseProgressSnapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Write today's course progress snapshot used by the trend dashboard. Safe to re-run: "
+        "the rows of the day are replaced. Schedule it once a day, e.g. shortly before midnight. "
+        "Status counts are the current ones, so past days cannot be snapshotted after the fact."
+    )
+
+    def handle(self, *args, **options):
+        rows = CourseProgressSnapshot.objects.take_snapshot()
+        self.stdout.write(self.style.SUCCESS(f"Progress snapshot for today: {rows} row(s)."))
@@ -0,0 +1,54 @@
+# Generated by Django 4.0.8 on 2026-10-18 20:13
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_progress_rollup(apps, schema_editor):
+    CourseCompletionStatusPerUser = apps.get_model('backend', 'CourseCompletionStatusPerUser')
+    CourseProgressRollup = apps.get_model('backend', 'CourseProgressRollup')
+    counts = (
+        CourseCompletionStatusPerUser.objects.filter(active=True)
+        .values('course_id', 'enrolled_user__customer_id', 'status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    CourseProgressRollup.objects.bulk_create([
+        CourseProgressRollup(
+            course_id=row['course_id'],
+            customer_id=row['enrolled_user__customer_id'],
+            status=row['status'],
+            count=row['total'],
+        )
+        for row in counts
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0005_alter_coursecompletionstatusperuser_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseProgressRollup',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('not_started', 'Not Started'), ('in_progress', 'In Progress'), ('completed', 'Completed')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_rollups', to='backend.course')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_rollups', to='backend.customer')),
+            ],
+            options={
+                'db_table': 'course_progress_rollup',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='courseprogressrollup',
+            constraint=models.UniqueConstraint(fields=('course', 'customer', 'status'), name='unique_course_progress_rollup'),
+        ),
+        migrations.RunPython(populate_progress_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.0.8 on 2026-10-18 20:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0006_course_progress_rollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursecompletionstatusperuser',
+            index=models.Index(fields=['course', 'status', 'active'], name='completion_course_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='courseenrollment',
+            index=models.Index(fields=['user', 'active'], name='enrollment_user_active_idx'),
+        ),
+    ]
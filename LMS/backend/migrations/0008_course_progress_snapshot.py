@@ -0,0 +1,36 @@
+# Generated by Django 4.0.8 on 2026-10-18 20:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0007_progress_count_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseProgressSnapshot',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('completed', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('not_started', models.IntegerField(default=0)),
+                ('attempts', models.IntegerField(default=0)),
+                ('avg_score', models.DecimalField(decimal_places=2, max_digits=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_snapshots', to='backend.course')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_snapshots', to='backend.customer')),
+            ],
+            options={
+                'db_table': 'course_progress_snapshot',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='courseprogresssnapshot',
+            constraint=models.UniqueConstraint(fields=('date', 'course', 'customer'), name='unique_course_progress_snapshot'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 4.0.8 on 2026-10-18 20:28
+
+from django.db import migrations, models
+from django.db.models import Count, F
+
+
+def delete_duplicates(model):
+    """
+    Keep one row per (enrolled_user, course): the active one, then the most recently
+    updated, then the newest. Returns the number of rows deleted.
+    """
+    duplicate_keys = (
+        model.objects.values('enrolled_user_id', 'course_id')
+        .annotate(total=Count('id'))
+        .filter(total__gt=1)
+        .order_by()
+    )
+    duplicate_ids = []
+    for key in duplicate_keys:
+        ids = list(
+            model.objects.filter(enrolled_user_id=key['enrolled_user_id'], course_id=key['course_id'])
+            .order_by('-active', F('updated_at').desc(nulls_last=True), '-id')
+            .values_list('id', flat=True)
+        )
+        duplicate_ids.extend(ids[1:])
+    for start in range(0, len(duplicate_ids), 1000):
+        model.objects.filter(id__in=duplicate_ids[start:start + 1000]).delete()
+    return len(duplicate_ids)
+
+
+def deduplicate_scores(apps, schema_editor):
+    delete_duplicates(apps.get_model('backend', 'QuizScore'))
+    CourseCompletionStatusPerUser = apps.get_model('backend', 'CourseCompletionStatusPerUser')
+    if not delete_duplicates(CourseCompletionStatusPerUser):
+        return
+    # the deleted records were counted in the rollup, recount it
+    CourseProgressRollup = apps.get_model('backend', 'CourseProgressRollup')
+    CourseProgressRollup.objects.all().delete()
+    counts = (
+        CourseCompletionStatusPerUser.objects.filter(active=True)
+        .values('course_id', 'enrolled_user__customer_id', 'status')
+        .annotate(total=Count('id'))
+        .order_by()
+    )
+    CourseProgressRollup.objects.bulk_create([
+        CourseProgressRollup(
+            course_id=row['course_id'],
+            customer_id=row['enrolled_user__customer_id'],
+            status=row['status'],
+            count=row['total'],
+        )
+        for row in counts
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0008_course_progress_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(deduplicate_scores, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='coursecompletionstatusperuser',
+            constraint=models.UniqueConstraint(fields=('enrolled_user', 'course'), name='unique_completion_status_user'),
+        ),
+        migrations.AddConstraint(
+            model_name='quizscore',
+            constraint=models.UniqueConstraint(fields=('enrolled_user', 'course'), name='unique_quiz_score_user'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.0.8 on 2026-10-18 20:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0009_unique_score_per_user'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreJob',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('quiz_score', 'Quiz Score'), ('completion_status', 'Completion Status')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.IntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(null=True)),
+                ('finished_at', models.DateTimeField(null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_jobs', to='backend.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_jobs', to='backend.user')),
+            ],
+            options={
+                'db_table': 'score_job',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='scorejob',
+            index=models.Index(fields=['status', 'run_after'], name='score_job_due_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scorejob',
+            constraint=models.UniqueConstraint(condition=models.Q(('attempts', 0), ('status', 'pending')), fields=('kind', 'course', 'user'), name='unique_pending_score_job'),
+        ),
+    ]
@@ -0,0 +1,129 @@
+# Generated by Django 4.0.8 on 2026-10-18 21:05
+
+import json
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+def split_ids(value):
+    return [int(n) for n in (value or '').split(',') if n.strip()]
+
+
+def join_ids(ids):
+    return ''.join(f'{n},' for n in ids)
+
+
+def load_answers(value):
+    try:
+        answers = json.loads(value or '{}')
+    except ValueError:
+        return {}
+    return answers if isinstance(answers, dict) else {}
+
+
+def to_structured(apps, schema_editor):
+    """
+    Parse the comma separated lists and the answers text into the new columns. The
+    unattempted list is always a suffix of the question order, the cursor is where it starts.
+    """
+    QuizAttemptHistory = apps.get_model('backend', 'QuizAttemptHistory')
+    attempts = QuizAttemptHistory.objects.only(
+        'id', 'question_list_order', 'unattempted_question', 'incorrect_questions', 'user_answers'
+    ).order_by('id')
+    batch = []
+    for attempt in attempts.iterator(chunk_size=2000):
+        attempt.question_ids = split_ids(attempt.question_list_order)
+        unattempted = split_ids(attempt.unattempted_question)
+        attempt.question_cursor = max(len(attempt.question_ids) - len(unattempted), 0)
+        attempt.incorrect_question_ids = split_ids(attempt.incorrect_questions)
+        attempt.answers = load_answers(attempt.user_answers)
+        batch.append(attempt)
+        if len(batch) >= 1000:
+            QuizAttemptHistory.objects.bulk_update(
+                batch, ['question_ids', 'question_cursor', 'incorrect_question_ids', 'answers']
+            )
+            batch = []
+    if batch:
+        QuizAttemptHistory.objects.bulk_update(batch, ['question_ids', 'question_cursor', 'incorrect_question_ids', 'answers'])
+
+
+def to_text(apps, schema_editor):
+    QuizAttemptHistory = apps.get_model('backend', 'QuizAttemptHistory')
+    attempts = QuizAttemptHistory.objects.only(
+        'id', 'question_ids', 'question_cursor', 'incorrect_question_ids', 'answers'
+    ).order_by('id')
+    fields = ['question_list_order', 'unattempted_question', 'incorrect_questions', 'user_answers']
+    batch = []
+    for attempt in attempts.iterator(chunk_size=2000):
+        attempt.question_list_order = join_ids(attempt.question_ids)
+        attempt.unattempted_question = join_ids(attempt.question_ids[attempt.question_cursor:])
+        attempt.incorrect_questions = join_ids(attempt.incorrect_question_ids)
+        attempt.user_answers = json.dumps(attempt.answers)
+        batch.append(attempt)
+        if len(batch) >= 1000:
+            QuizAttemptHistory.objects.bulk_update(batch, fields)
+            batch = []
+    if batch:
+        QuizAttemptHistory.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0010_score_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizattempthistory',
+            name='question_cursor',
+            field=models.PositiveIntegerField(default=0, verbose_name='Next Question'),
+        ),
+        migrations.AddField(
+            model_name='quizattempthistory',
+            name='question_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), default=list, size=None, verbose_name='Question Order'),
+        ),
+        migrations.AddField(
+            model_name='quizattempthistory',
+            name='incorrect_question_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=None, verbose_name='Incorrect questions'),
+        ),
+        migrations.AddField(
+            model_name='quizattempthistory',
+            name='answers',
+            field=models.JSONField(blank=True, default=dict, verbose_name='User Answers'),
+        ),
+        migrations.RunPython(to_structured, to_text),
+        migrations.RemoveField(
+            model_name='quizattempthistory',
+            name='question_list_order',
+        ),
+        migrations.RemoveField(
+            model_name='quizattempthistory',
+            name='unattempted_question',
+        ),
+        migrations.RemoveField(
+            model_name='quizattempthistory',
+            name='incorrect_questions',
+        ),
+        migrations.RemoveField(
+            model_name='quizattempthistory',
+            name='user_answers',
+        ),
+        migrations.RenameField(
+            model_name='quizattempthistory',
+            old_name='question_ids',
+            new_name='question_list_order',
+        ),
+        migrations.RenameField(
+            model_name='quizattempthistory',
+            old_name='incorrect_question_ids',
+            new_name='incorrect_questions',
+        ),
+        migrations.RenameField(
+            model_name='quizattempthistory',
+            old_name='answers',
+            new_name='user_answers',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.8 on 2026-10-18 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0011_structured_quiz_attempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quiz',
+            name='content_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
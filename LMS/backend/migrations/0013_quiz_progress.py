@@ -0,0 +1,75 @@
+# Generated by Django 4.0.8 on 2026-10-18 21:20
+
+from django.db import migrations, models
+from django.db.models import Sum
+import django.db.models.deletion
+
+
+def backfill_quiz_progress(apps, schema_editor):
+    """
+    The old score strings were keyed by the repr of a manager rather than a quiz id, so they
+    cannot be carried over. Start from the sittings still stored: the points scored and the
+    questions answered (the cursor) per user and quiz.
+    """
+    QuizAttemptHistory = apps.get_model('backend', 'QuizAttemptHistory')
+    QuizProgress = apps.get_model('backend', 'QuizProgress')
+    totals = (
+        QuizAttemptHistory.objects.values('enrolled_user_id', 'quiz_id')
+        .annotate(score=Sum('current_score'), possible=Sum('question_cursor'))
+        .filter(possible__gt=0)
+        .order_by()
+    )
+    batch = []
+    for row in totals.iterator(chunk_size=2000):
+        batch.append(QuizProgress(
+            enrolled_user_id=row['enrolled_user_id'], quiz_id=row['quiz_id'], score=row['score'], possible=row['possible']
+        ))
+        if len(batch) >= 1000:
+            QuizProgress.objects.bulk_create(batch)
+            batch = []
+    QuizProgress.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0012_quiz_content_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizProgress',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('score', models.IntegerField(default=0)),
+                ('possible', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'quiz_progress',
+            },
+        ),
+        migrations.RemoveField(
+            model_name='progress',
+            name='score',
+        ),
+        migrations.AddIndex(
+            model_name='quizattempthistory',
+            index=models.Index(fields=['enrolled_user', 'complete', 'end'], name='quiz_attempt_exams_idx'),
+        ),
+        migrations.AddField(
+            model_name='quizprogress',
+            name='enrolled_user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='quiz_progress', to='backend.user'),
+        ),
+        migrations.AddField(
+            model_name='quizprogress',
+            name='quiz',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress', to='backend.quiz'),
+        ),
+        migrations.AddConstraint(
+            model_name='quizprogress',
+            constraint=models.UniqueConstraint(fields=('enrolled_user', 'quiz'), name='unique_quiz_progress'),
+        ),
+        migrations.RunPython(backfill_quiz_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.0.8 on 2026-10-18 22:10
+
+from django.db import migrations
+from django.db.models import Avg, Case, F, FloatField, Func, Value, When
+
+
+def percentage():
+    return Case(
+        When(
+            question_list_order__len__gt=0,
+            then=F('current_score') * Value(100.0) / Func(F('question_list_order'), function='cardinality'),
+        ),
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def rewrite_avg_score(apps, average):
+    """
+    Recompute avg_score of the stored snapshots from the attempts completed on their date,
+    the same way CourseProgressSnapshot.objects.take_snapshot groups them.
+    """
+    QuizAttemptHistory = apps.get_model('backend', 'QuizAttemptHistory')
+    CourseProgressSnapshot = apps.get_model('backend', 'CourseProgressSnapshot')
+    averages = {
+        (row['end__date'], row['course_id'], row['enrolled_user__customer_id']): row['avg_score']
+        for row in (
+            QuizAttemptHistory.objects.filter(complete=True, end__isnull=False, course__isnull=False)
+            .values('end__date', 'course_id', 'enrolled_user__customer_id')
+            .annotate(avg_score=Avg(average))
+            .order_by()
+        )
+    }
+    batch = []
+    snapshots = CourseProgressSnapshot.objects.filter(avg_score__isnull=False).only(
+        'id', 'date', 'course_id', 'customer_id', 'avg_score'
+    ).order_by('id')
+    for snapshot in snapshots.iterator(chunk_size=2000):
+        avg_score = averages.get((snapshot.date, snapshot.course_id, snapshot.customer_id))
+        snapshot.avg_score = round(avg_score, 2) if avg_score is not None else None
+        batch.append(snapshot)
+        if len(batch) >= 1000:
+            CourseProgressSnapshot.objects.bulk_update(batch, ['avg_score'])
+            batch = []
+    if batch:
+        CourseProgressSnapshot.objects.bulk_update(batch, ['avg_score'])
+
+
+def to_percentage(apps, schema_editor):
+    rewrite_avg_score(apps, percentage())
+
+
+def to_raw_score(apps, schema_editor):
+    rewrite_avg_score(apps, F('current_score'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backend', '0013_quiz_progress'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_percentage, to_raw_score),
+    ]
@@ -1,20 +1,26 @@
-from django.db import models
+import datetime
+import random
+from collections import Counter
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
+from django.db import IntegrityError, connection, models, transaction
 from django.core.validators import FileExtensionValidator
 from django.urls import reverse
-from django.db.models import Q
-from django.db.models.signals import pre_save, post_save, post_delete
-from django.dispatch import receiver
-import re
+from django.db.models import Avg, Case, Count, DecimalField, ExpressionWrapper, F, FloatField, Func, OuterRef, Prefetch, Q, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Cast, Coalesce, FirstValue
+from django.db.models.signals import m2m_changed, pre_delete, pre_save, post_save, post_delete
+from django.dispatch import Signal, receiver
 import json
 from django.core.exceptions import ValidationError, ImproperlyConfigured
-from django.core.validators import (
-    MaxValueValidator,
-    validate_comma_separated_integer_list,
-)
+from django.core.validators import MaxValueValidator
 from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
 from django.utils.timezone import now
 from django.db.models.signals import pre_save
 from backend.utils import unique_slug_generator
+from core.answer_key_cache import answer_key_cache
+from core.dashboard_cache import invalidate_dashboards, invalidate_dashboards_for_users
 from .coremodels import User, Customer
 
 class ActivityLog(models.Model):
@@ -30,7 +36,61 @@ class ActivityLog(models.Model):
 # -------------------------------------
     # course models
 # -------------------------------------
-class CourseManager(models.Manager):
+def _count_per_course(queryset, value='pk'):
+    """Correlated subquery counting `queryset` rows of the outer course, 0 when there are none."""
+    counts = (
+        queryset.filter(course=OuterRef('pk'))
+        .order_by()
+        .values('course')
+        .annotate(total=Count(value) if value == 'pk' else Sum(value))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts[:1], output_field=models.IntegerField()), 0)
+
+
+class CourseQuerySet(models.QuerySet):
+    STATISTICS = (
+        'active_registration_count',
+        'active_enrollment_count',
+        'completion_count',
+        'in_progress_count',
+        'not_started_count',
+    )
+
+    def with_statistics(self, *names, customer_id=None):
+        """
+        Annotate each course with the named counts (default: all of STATISTICS), computed as
+        correlated subqueries so the listing stays one SQL statement that can be ordered and
+        sliced on any count. customer_id restricts the counts to one customer.
+        Completion counts are read from CourseProgressRollup.
+        """
+        names = names or self.STATISTICS
+        unknown = set(names) - set(self.STATISTICS)
+        if unknown:
+            raise ValueError(f"Unknown course statistics: {', '.join(sorted(unknown))}")
+
+        registrations = CourseRegisterRecord.objects.filter(active=True, deleted_at__isnull=True)
+        enrollments = CourseEnrollment.objects.filter(active=True, deleted_at__isnull=True)
+        rollups = CourseProgressRollup.objects.all()
+        if customer_id is not None:
+            registrations = registrations.filter(customer_id=customer_id)
+            enrollments = enrollments.filter(user__customer_id=customer_id)
+            rollups = rollups.filter(customer_id=customer_id)
+
+        statistics = {
+            'active_registration_count': lambda: _count_per_course(registrations),
+            'active_enrollment_count': lambda: _count_per_course(enrollments),
+            'completion_count': lambda: _count_per_course(
+                rollups.filter(status=CourseCompletionStatusPerUser.COMPLETED), 'count'),
+            'in_progress_count': lambda: _count_per_course(
+                rollups.filter(status=CourseCompletionStatusPerUser.IN_PROGRESS), 'count'),
+            'not_started_count': lambda: _count_per_course(
+                rollups.filter(status=CourseCompletionStatusPerUser.NOT_STARTED), 'count'),
+        }
+        return self.annotate(**{name: statistics[name]() for name in names})
+
+
+class CourseManager(models.Manager.from_queryset(CourseQuerySet)):
     def search(self, query=None):
         queryset = self.get_queryset()
         if query is not None:
@@ -132,6 +192,10 @@ class CourseEnrollment(models.Model):
     
     class Meta:
         db_table = 'course_enrollment'
+        indexes = [
+            # active enrollment checks per user (client admin progress counts)
+            models.Index(fields=['user', 'active'], name='enrollment_user_active_idx'),
+        ]
 
 # -------------------------------------
     # upload reading material models
@@ -289,6 +353,8 @@ class Quiz(models.Model):
     updated_at = models.DateField(auto_now=True)
     active = models.BooleanField(default=True)
     deleted_at = models.DateTimeField(null=True)
+    # incremented whenever one of the quiz's questions or choices changes, keys the answer key cache
+    content_version = models.PositiveIntegerField(default=0)
     
     def save(self, force_insert=False, force_update=False, *args, **kwargs):
         if self.single_attempt is True:
@@ -371,7 +437,9 @@ class Question(models.Model):
     def __str__(self):
         return self.content
     
-    def check_if_correct(self, guess):
+    def check_if_correct(self, guess, quiz=None):
+        if quiz is not None:
+            return answer_key_cache.get(quiz).is_correct(self.id, guess)
         answer = Choice.objects.get(id=guess)
 
         if answer.correct is True:
@@ -388,16 +456,32 @@ class Question(models.Model):
             return queryset.order_by()
         return queryset
 
-    def get_choices(self):
+    @staticmethod
+    def sort_choices(choices, choice_order):
+        """order_choices for choices already loaded, sorts the list in place and returns it"""
+        if choice_order == "content":
+            choices.sort(key=lambda choice: choice.choice)
+        elif choice_order == "random":
+            random.shuffle(choices)
+        return choices
+
+    def get_choices(self, quiz=None):
+        if quiz is not None:
+            return answer_key_cache.get(quiz).get_choices(self.id)
+        if hasattr(self, 'prefetched_choices'):
+            # loaded by QuizAttemptHistory.get_questions
+            return self.sort_choices(list(self.prefetched_choices), self.choice_order)
         return self.order_choices(Choice.objects.filter(question=self))
 
-    def get_choices_list(self):
+    def get_choices_list(self, quiz=None):
         return [
             (choice.id, choice.choice)
-            for choice in self.order_choices(Choice.objects.filter(question=self))
+            for choice in self.get_choices(quiz)
         ]
 
-    def answer_choice_to_string(self, guess):
+    def answer_choice_to_string(self, guess, quiz=None):
+        if quiz is not None:
+            return answer_key_cache.get(quiz).choice_text(guess)
         return Choice.objects.get(id=guess).choice
 
 class Choice(models.Model):
@@ -446,15 +530,72 @@ def update_question_and_quiz_active_status(sender, instance, **kwargs):
                     quiz.active = True
                     quiz.save()
 
+def bump_quiz_content_version(quiz_ids):
+    Quiz.objects.filter(id__in=list(quiz_ids)).update(content_version=F('content_version') + 1)
+
+
+@receiver(post_save, sender=Question)
+@receiver(pre_delete, sender=Question)
+def bump_question_quizzes_content_version(sender, instance, **kwargs):
+    # pre_delete: the question's quiz links are gone by post_delete
+    bump_quiz_content_version(instance.quizzes.values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Choice)
+def bump_choice_quizzes_content_version(sender, instance, **kwargs):
+    bump_quiz_content_version(Quiz.objects.filter(questions__id=instance.question_id).values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=Question.quizzes.through)
+def bump_linked_quizzes_content_version(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if reverse:
+        # instance is the quiz
+        bump_quiz_content_version([instance.id])
+    elif action == 'pre_clear':
+        bump_quiz_content_version(instance.quizzes.values_list('id', flat=True))
+    else:
+        bump_quiz_content_version(pk_set)
+
+
+class ArrayAppend(Func):
+    """array_append(array, element)"""
+    function = 'array_append'
+    output_field = ArrayField(models.IntegerField())
+
+
+class ArrayRemove(Func):
+    """array_remove(array, element): every occurrence of element removed"""
+    function = 'array_remove'
+    output_field = ArrayField(models.IntegerField())
+
+
+class Cardinality(Func):
+    """cardinality(array): the number of elements, 0 for an empty array"""
+    function = 'cardinality'
+    output_field = models.IntegerField()
+
+
+class JSONMerge(Func):
+    """jsonb || jsonb: the keys of the right-hand object are added to, or replace, the left-hand one's"""
+    arg_joiner = ' || '
+    template = '(%(expressions)s)'
+    output_field = models.JSONField()
+
+
+# sent by QuizAttemptHistory.mark_quiz_complete() inside its transaction, once per attempt;
+# receivers get the completed attempt as `attempt`
+quiz_attempt_completed = Signal()
+
+
 class QuizAttemptHistoryManager(models.Manager):
     def new_sitting(self, enrolled_user, quiz, course):
         # if quiz.random_order is True:
         #     question_set = quiz.question_set.all().select_subclasses().order_by("?")
         # else:
         #     question_set = quiz.question_set.all().select_subclasses()
-        question_set = quiz.questions.all()
-
-        question_set = [item.id for item in question_set]
+        question_set = list(quiz.questions.values_list('id', flat=True))
 
         if len(question_set) == 0:
             raise ImproperlyConfigured(
@@ -464,18 +605,16 @@ class QuizAttemptHistoryManager(models.Manager):
         # if quiz.max_questions and quiz.max_questions < len(question_set):
         #     question_set = question_set[:quiz.max_questions]
 
-        questions = ",".join(map(str, question_set)) + ","
-
         new_sitting = self.create(
             enrolled_user=enrolled_user,
             quiz=quiz,
             course=course,
-            question_list_order=questions,
-            unattempted_question=questions,
-            incorrect_questions="",
+            question_list_order=question_set,
+            question_cursor=0,
+            incorrect_questions=[],
             current_score=0,
             complete=False,
-            user_answers="{}",
+            user_answers={},
         )
         return new_sitting
 
@@ -502,26 +641,26 @@ class QuizAttemptHistory(models.Model):
     course = models.ForeignKey(
         Course, null=True, verbose_name=_("Course"), on_delete=models.CASCADE
     )
-    question_list_order = models.CharField(
-        max_length=1024,
+    question_list_order = ArrayField(
+        models.IntegerField(),
+        default=list,
         verbose_name=_("Question Order"),
-        validators=[validate_comma_separated_integer_list],
     )
-    unattempted_question = models.CharField(max_length=1024,
-        verbose_name=_("UnAttempted Question List"),
-        validators=[validate_comma_separated_integer_list],)
-    incorrect_questions = models.CharField(
-        max_length=1024,
+    # position in question_list_order of the next question to ask, the questions before it are attempted
+    question_cursor = models.PositiveIntegerField(default=0, verbose_name=_("Next Question"))
+    incorrect_questions = ArrayField(
+        models.IntegerField(),
+        default=list,
         blank=True,
         verbose_name=_("Incorrect questions"),
-        validators=[validate_comma_separated_integer_list],
     )
     current_score = models.IntegerField(verbose_name=_("Current Score"))
     complete = models.BooleanField(
         default=False, blank=False, verbose_name=_("Complete")
     )
-    user_answers = models.TextField(
-        blank=True, default="{}", verbose_name=_("User Answers")
+    # {str(question id): guess}
+    user_answers = models.JSONField(
+        blank=True, default=dict, verbose_name=_("User Answers")
     )
     start = models.DateTimeField(auto_now_add=True, verbose_name=_("Start"))
     end = models.DateTimeField(null=True, blank=True, verbose_name=_("End"))
@@ -534,34 +673,58 @@ class QuizAttemptHistory(models.Model):
     class Meta:
         permissions = (("view_sittings", _("Can see completed exams.")),)
         db_table = 'quiz_attempt_history'
+        indexes = [
+            # Progress.show_exams
+            models.Index(fields=['enrolled_user', 'complete', 'end'], name='quiz_attempt_exams_idx'),
+        ]
+
+    def _update_columns(self, **changes):
+        """
+        UPDATE only the given columns of this attempt, computed in the database so the
+        question lists and answers are never sent back whole.
+        """
+        self.updated_at = now()
+        type(self).objects.filter(pk=self.pk).update(updated_at=self.updated_at, **changes)
+
+    @staticmethod
+    def percentage_expression():
+        """SQL for an attempt's score as a percentage of its questions, 0 for an attempt without questions."""
+        question_count = Cardinality('question_list_order')
+        return Case(
+            When(question_list_order__len__gt=0, then=F('current_score') * Value(100.0) / question_count),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+
+    @property
+    def has_unattempted_questions(self):
+        return self.question_cursor < len(self.question_list_order)
 
     def get_first_question(self):
-        if not self.unattempted_question:
+        if not self.has_unattempted_questions:
             return False
 
-        first, _ = self.unattempted_question.split(",", 1)
-        question_id = int(first)
+        question_id = self.question_list_order[self.question_cursor]
         # return Question.objects.get_subclass(id=question_id)
         return Question.objects.get(id=question_id)
 
     def remove_first_question(self):
-        if not self.unattempted_question:
+        if not self.has_unattempted_questions:
             return
 
-        _, others = self.unattempted_question.split(",", 1)
-        self.unattempted_question = others
-        self.save()
+        self._update_columns(question_cursor=F('question_cursor') + 1)
+        self.question_cursor += 1
 
     def add_to_score(self, points):
+        self._update_columns(current_score=F('current_score') + int(points))
         self.current_score += int(points)
-        self.save()
 
     @property
     def get_current_score(self):
         return self.current_score
 
     def _question_ids(self):
-        return [int(n) for n in self.question_list_order.split(",") if n]
+        return list(self.question_list_order)
 
     @property
     def get_percent_correct(self):
@@ -581,28 +744,41 @@ class QuizAttemptHistory(models.Model):
             return 0
 
     def mark_quiz_complete(self):
-        self.complete = True
-        self.end = now()
-        self.save()
+        """
+        Marks the attempt complete and sets its end with one UPDATE, leaving the question
+        lists and answers alone. The first call for an attempt also sends
+        quiz_attempt_completed, in the same transaction; later calls write nothing.
+        """
+        if self.complete:
+            return
+        with transaction.atomic():
+            end = now()
+            # conditional update, so only one of concurrent calls sees the attempt as newly completed
+            newly_completed = type(self).objects.filter(pk=self.pk, complete=False).update(
+                complete=True, end=end, updated_at=end
+            )
+            if not newly_completed:
+                self.refresh_from_db(fields=['complete', 'end', 'updated_at'])
+                return
+            self.complete = True
+            self.end = end
+            self.updated_at = end
+            quiz_attempt_completed.send(sender=type(self), attempt=self)
 
     def add_incorrect_question(self, question):
-        if len(self.incorrect_questions) > 0:
-            self.incorrect_questions += ","
-        self.incorrect_questions += str(question.id) + ","
+        self._update_columns(incorrect_questions=ArrayAppend('incorrect_questions', Value(question.id)))
+        self.incorrect_questions.append(question.id)
         if self.complete:
             self.add_to_score(-1)
-        self.save()
 
     @property
     def get_incorrect_questions(self):
-        return [int(q) for q in self.incorrect_questions.split(",") if q]
+        return list(self.incorrect_questions)
 
     def remove_incorrect_question(self, question):
-        current = self.get_incorrect_questions
-        current.remove(question.id)
-        self.incorrect_questions = ",".join(map(str, current))
+        self._update_columns(incorrect_questions=ArrayRemove('incorrect_questions', Value(question.id)))
+        self.incorrect_questions = [q for q in self.incorrect_questions if q != question.id]
         self.add_to_score(1)
-        self.save()
 
     @property
     def check_if_passed(self):
@@ -615,23 +791,66 @@ class QuizAttemptHistory(models.Model):
         else:
             return f"You failed this quiz, give it one chance again."
 
+    @staticmethod
+    def _merge_answer(question, guess):
+        return JSONMerge('user_answers', Cast(Value(json.dumps({question.id: guess})), models.JSONField()))
+
     def add_user_answer(self, question, guess):
-        current = json.loads(self.user_answers)
-        current[question.id] = guess
-        self.user_answers = json.dumps(current)
-        self.save()
+        self._update_columns(user_answers=self._merge_answer(question, guess))
+        self.user_answers[str(question.id)] = guess
+
+    def submit_answer(self, question, guess, is_correct):
+        """
+        Record the answer to the current question and move on to the next one in a single
+        UPDATE: score, incorrect questions, answers and cursor. The UPDATE only applies while
+        the cursor is still on this question, so a resubmitted answer is not counted twice.
+        Returns False when it was already recorded.
+        """
+        changes = {
+            'user_answers': self._merge_answer(question, guess),
+            'question_cursor': F('question_cursor') + 1,
+        }
+        if is_correct:
+            changes['current_score'] = F('current_score') + 1
+        else:
+            changes['incorrect_questions'] = ArrayAppend('incorrect_questions', Value(question.id))
+        self.updated_at = now()
+        submitted = type(self).objects.filter(pk=self.pk, question_cursor=self.question_cursor).update(
+            updated_at=self.updated_at, **changes
+        )
+        if not submitted:
+            self.refresh_from_db(
+                fields=['question_cursor', 'current_score', 'incorrect_questions', 'user_answers', 'updated_at']
+            )
+            return False
+
+        self.user_answers[str(question.id)] = guess
+        self.question_cursor += 1
+        if is_correct:
+            self.current_score += 1
+        else:
+            self.incorrect_questions.append(question.id)
+        return True
 
     def get_questions(self, with_answers=False):
+        """
+        The sitting's questions in question_list_order, with their active choices prefetched
+        as prefetched_choices (used by Question.get_choices): two queries whatever the number
+        of questions. Questions no longer in the quiz are left out.
+        """
         question_ids = self._question_ids()
-        questions = sorted(
-            self.quiz.questions.filter(id__in=question_ids),
-            key=lambda q: question_ids.index(q.id),
+        questions_by_id = (
+            Question.objects.filter(quizzes__id=self.quiz_id)
+            .prefetch_related(
+                Prefetch('choice_set', queryset=Choice.objects.filter(active=True), to_attr='prefetched_choices')
+            )
+            .in_bulk(question_ids)
         )
+        questions = [questions_by_id[question_id] for question_id in question_ids if question_id in questions_by_id]
 
         if with_answers:
-            user_answers = json.loads(self.user_answers)
             for question in questions:
-                question.user_answer = user_answers[str(question.id)]
+                question.user_answer = self.user_answers.get(str(question.id))
 
         return questions
 
@@ -644,13 +863,13 @@ class QuizAttemptHistory(models.Model):
         return len(self._question_ids())
 
     def progress(self):
-        answered = len(json.loads(self.user_answers))
+        answered = len(self.user_answers)
         total = self.get_max_score
         return answered, total
 
 class ProgressManager(models.Manager):
     def new_progress(self, enrolled_user):
-        new_progress = self.create(enrolled_user=enrolled_user, score="")
+        new_progress = self.create(enrolled_user=enrolled_user)
         new_progress.save()
         return new_progress
 
@@ -658,11 +877,6 @@ class ProgressManager(models.Manager):
 class Progress(models.Model):
     id = models.AutoField(primary_key=True)
     enrolled_user = models.ForeignKey(User, on_delete=models.CASCADE)
-    score = models.CharField(
-        max_length=1024,
-        verbose_name=_("Score"),
-        validators=[validate_comma_separated_integer_list],
-    )
 
     objects = ProgressManager()
 
@@ -671,7 +885,11 @@ class Progress(models.Model):
         verbose_name_plural = _("User progress records")
         db_table = 'progress'
 
-    def update_score(self, question, score_to_add=0, possible_to_add=0):
+    def update_score(self, question, score_to_add=0, possible_to_add=0, quiz=None):
+        """
+        Add to the user's totals for `quiz`, or for every quiz of the question when it is
+        not given. See QuizProgress.
+        """
 
         if any(
             [
@@ -686,32 +904,63 @@ class Progress(models.Model):
         ):
             return _("error"), _("category does not exist or invalid score")
 
-        to_find = re.escape(str(question.quizzes)) + r",(?P<score>\d+),(?P<possible>\d+),"
+        quiz_ids = [quiz.id] if quiz is not None else question.quizzes.values_list('id', flat=True)
+        for quiz_id in quiz_ids:
+            QuizProgress.objects.add_score(self.enrolled_user_id, quiz_id, abs(score_to_add), abs(possible_to_add))
 
-        match = re.search(to_find, self.score, re.IGNORECASE)
+    def get_quiz_scores(self):
+        """{quiz_id: (score, possible)} over all of the user's answers"""
+        return {
+            quiz_id: (score, possible)
+            for quiz_id, score, possible in QuizProgress.objects.filter(enrolled_user_id=self.enrolled_user_id)
+            .values_list('quiz_id', 'score', 'possible')
+        }
 
-        if match:
-            updated_score = int(match.group("score")) + abs(score_to_add)
-            updated_possible = int(match.group("possible")) + abs(possible_to_add)
+    def show_exams(self):
+        # served by the quiz_attempt_history (enrolled_user, complete, end) index
+        return QuizAttemptHistory.objects.filter(enrolled_user=self.enrolled_user, complete=True).order_by("-end")
 
-            new_score = ",".join(
-                [str(question.quizzes), str(updated_score), str(updated_possible), ""]
-            )
 
-            # swap old score for the new one
-            self.score = self.score.replace(match.group(), new_score)
-            self.save()
+class QuizProgressManager(models.Manager):
+
+    def add_score(self, enrolled_user_id, quiz_id, score_to_add, possible_to_add):
+        """
+        Add to the (user, quiz) totals with one F() UPDATE, creating the row on the user's
+        first answer to the quiz. The cost does not depend on how many quizzes the user took.
+        """
+        rows = self.filter(enrolled_user_id=enrolled_user_id, quiz_id=quiz_id)
+        changes = {
+            'score': F('score') + score_to_add,
+            'possible': F('possible') + possible_to_add,
+            'updated_at': now(),
+        }
+        if rows.update(**changes):
+            return
+        try:
+            with transaction.atomic():
+                self.create(enrolled_user_id=enrolled_user_id, quiz_id=quiz_id, score=score_to_add, possible=possible_to_add)
+        except IntegrityError:
+            # created concurrently
+            rows.update(**changes)
 
-        else:
-            #  if not present but existing, add with the points passed in
-            self.score += ",".join(
-                [str(question.quizzes), str(score_to_add), str(possible_to_add), ""]
-            )
-            self.save()
 
-    def show_exams(self):
-        return QuizAttemptHistory.objects.filter(enrolled_user=self.enrolled_user, complete=True).order_by("-end")
-    
+class QuizProgress(models.Model):
+    """Points scored and possible over all of a user's answers to a quiz, every sitting included."""
+    id = models.AutoField(primary_key=True)
+    enrolled_user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='quiz_progress')
+    quiz = models.ForeignKey(Quiz, on_delete=models.CASCADE, related_name='progress')
+    score = models.IntegerField(default=0)
+    possible = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = QuizProgressManager()
+
+    class Meta:
+        db_table = 'quiz_progress'
+        constraints = [
+            models.UniqueConstraint(fields=['enrolled_user', 'quiz'], name='unique_quiz_progress'),
+        ]
+
 class Notification(models.Model):
     id = models.AutoField(primary_key=True)
     message = models.TextField()
@@ -724,6 +973,134 @@ class Notification(models.Model):
 
 
 # score and dashboard related models
+def _split_pairs_to_initialize(queryset, course_ids, user_ids):
+    """
+    Split course_ids x user_ids for a table holding one row per (course, enrolled_user):
+    returns (enrolled pairs without a row, {'skipped': pairs with a row, 'invalid': pairs
+    without an enrollment}). Two queries, whatever the number of pairs.
+    """
+    pairs = {(course_id, user_id) for course_id in course_ids for user_id in user_ids}
+    enrolled = set(
+        CourseEnrollment.objects.filter(course_id__in=course_ids, user_id__in=user_ids).values_list('course_id', 'user_id')
+    )
+    existing = set(
+        queryset.filter(course_id__in=course_ids, enrolled_user_id__in=user_ids).values_list('course_id', 'enrolled_user_id')
+    )
+    valid = pairs & enrolled
+    return sorted(valid - existing), {'skipped': len(valid & existing), 'invalid': len(pairs - enrolled)}
+
+
+def _create_missing(queryset, records, batch_size):
+    """
+    bulk_create records for pairs checked to have no row and return the ones actually
+    inserted. When a pair was inserted concurrently in the meantime, the unique constraint
+    rejects the batch; the records are then inserted one by one, each in its own savepoint,
+    and the rejected ones are left out.
+    """
+    try:
+        with transaction.atomic():
+            queryset.bulk_create(records, batch_size=batch_size)
+        return records
+    except IntegrityError:
+        pass
+    created = []
+    for record in records:
+        try:
+            with transaction.atomic():
+                queryset.bulk_create([record])
+        except IntegrityError:
+            continue
+        created.append(record)
+    return created
+
+
+class CourseCompletionStatusManager(models.Manager):
+
+    def update_from_scores(self, pairs):
+        """
+        Set the status of each (course_id, user_id) pair from its QuizScore, read in one query.
+        Returns (statuses, set_statuses() results); pairs without a score are left out of both.
+        """
+        quiz_scores = QuizScore.objects.filter(
+            course_id__in={course_id for course_id, _ in pairs},
+            enrolled_user_id__in={user_id for _, user_id in pairs},
+        ).values_list('course_id', 'enrolled_user_id', 'completed_quiz_count', 'total_quizzes_per_course')
+        statuses = {
+            (course_id, user_id): self.model.derive_status(completed_quiz_count, total_quizzes_per_course)
+            for course_id, user_id, completed_quiz_count, total_quizzes_per_course in quiz_scores
+            if (course_id, user_id) in pairs
+        }
+        return statuses, self.set_statuses(statuses)
+
+    def initialize(self, course_ids, user_ids, batch_size=1000):
+        """
+        Create a not started record for every enrolled (course, user) pair that has none.
+        Returns (created records, {'created': n, 'skipped': n, 'invalid': n}); pairs created
+        concurrently after the check count as skipped.
+        """
+        pairs, counts = _split_pairs_to_initialize(self, course_ids, user_ids)
+        records = [
+            self.model(course_id=course_id, enrolled_user_id=user_id, status=self.model.NOT_STARTED)
+            for course_id, user_id in pairs
+        ]
+        with transaction.atomic():
+            records = _create_missing(self, records, batch_size)
+            # bulk_create skips save(), so count the new records in the dashboard rollup here
+            CourseProgressRollup.objects.record_created(records)
+            if records:
+                invalidate_dashboards_for_users({record.enrolled_user_id for record in records})
+        counts['created'] = len(records)
+        counts['skipped'] += len(pairs) - len(records)
+        return records, counts
+
+    def set_statuses(self, statuses, batch_size=1000):
+        """
+        statuses: {(course_id, user_id): status}. Updates the records whose status differs and
+        creates the missing ones with bulk writes, keeping CourseProgressRollup and the
+        dashboard cache in step. Returns {(course_id, user_id): 'created'|'updated'|'unchanged'}.
+        """
+        results = {}
+        if not statuses:
+            return results
+        with transaction.atomic():
+            records = self.select_for_update().filter(
+                course_id__in={course_id for course_id, _ in statuses},
+                enrolled_user_id__in={user_id for _, user_id in statuses},
+            ).only('id', 'course_id', 'enrolled_user_id', 'status', 'active')
+            to_update = []
+            state_changes = []
+            for record in records:
+                pair = (record.course_id, record.enrolled_user_id)
+                if pair not in statuses:
+                    continue
+                if record.status == statuses[pair]:
+                    results.setdefault(pair, 'unchanged')
+                    continue
+                previous = record.get_rollup_state()
+                record.status = statuses[pair]
+                record.updated_at = now()
+                record._rollup_state = record.get_rollup_state()
+                state_changes.append((previous, record._rollup_state))
+                to_update.append(record)
+                results[pair] = 'updated'
+            self.bulk_update(to_update, ['status', 'updated_at'], batch_size=batch_size)
+
+            to_create = [
+                self.model(course_id=course_id, enrolled_user_id=user_id, status=status)
+                for (course_id, user_id), status in statuses.items()
+                if (course_id, user_id) not in results
+            ]
+            self.bulk_create(to_create, batch_size=batch_size)
+            results.update({(record.course_id, record.enrolled_user_id): 'created' for record in to_create})
+
+            state_changes.extend((None, record.get_rollup_state()) for record in to_create)
+            CourseProgressRollup.objects.apply_state_changes(state_changes)
+            changed_user_ids = {user_id for (_, user_id), result in results.items() if result != 'unchanged'}
+            if changed_user_ids:
+                invalidate_dashboards_for_users(changed_user_ids)
+        return results
+
+
 class CourseCompletionStatusPerUser(models.Model):
     """
     on started status - completion_status = in_progress_status = False
@@ -752,9 +1129,510 @@ class CourseCompletionStatusPerUser(models.Model):
     updated_at = models.DateTimeField(auto_now=True, auto_now_add=False, null=True)
     deleted_at = models.DateTimeField(null=True)
     active = models.BooleanField(default=True)
+
+    objects = CourseCompletionStatusManager()
+
     class Meta:
         db_table = 'course_completion_status'
-        
+        constraints = [
+            models.UniqueConstraint(fields=['enrolled_user', 'course'], name='unique_completion_status_user'),
+        ]
+        indexes = [
+            # per course status counts on the dashboards
+            models.Index(fields=['course', 'status', 'active'], name='completion_course_status_idx'),
+        ]
+
+    @classmethod
+    def derive_status(cls, completed_quiz_count, total_quizzes_per_course):
+        """Status implied by the counters of the user's QuizScore for the course."""
+        if total_quizzes_per_course == completed_quiz_count:
+            return cls.COMPLETED
+        if total_quizzes_per_course > completed_quiz_count:
+            return cls.IN_PROGRESS
+        return cls.NOT_STARTED
+
+    # fields that decide which CourseProgressRollup row, if any, counts this record
+    ROLLUP_FIELDS = ('course', 'enrolled_user', 'status', 'active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._rollup_state = instance.get_rollup_state()
+        return instance
+
+    def get_rollup_state(self, saved_state=None):
+        """
+        (course_id, enrolled_user_id, status, active) as held in memory. Deferred fields are
+        taken from saved_state, the result is None if that leaves any unknown.
+        """
+        attnames = ('course_id', 'enrolled_user_id', 'status', 'active')
+        state = []
+        for index, attname in enumerate(attnames):
+            if attname in self.__dict__:
+                state.append(self.__dict__[attname])
+            elif saved_state is not None:
+                state.append(saved_state[index])
+            else:
+                return None
+        return tuple(state)
+
+    def get_saved_rollup_state(self):
+        state = getattr(self, '_rollup_state', None)
+        if state is None:
+            state = type(self).objects.filter(pk=self.pk).values_list(
+                'course_id', 'enrolled_user_id', 'status', 'active'
+            ).first()
+        return state
+
+    def save(self, *args, **kwargs):
+        """Saves the record and moves its count between CourseProgressRollup rows in the same transaction."""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & set(self.ROLLUP_FIELDS):
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous = None if self._state.adding else self.get_saved_rollup_state()
+            super().save(*args, **kwargs)
+            current = self.get_rollup_state(previous)
+            if previous != current:
+                CourseProgressRollup.objects.apply_state_change(previous, current)
+            self._rollup_state = current
+
+
+@receiver(post_delete, sender=CourseCompletionStatusPerUser)
+def remove_from_progress_rollup(sender, instance, **kwargs):
+    state = getattr(instance, '_rollup_state', None) or instance.get_rollup_state()
+    CourseProgressRollup.objects.apply_state_change(state, None)
+
+
+class CourseProgressRollupManager(models.Manager):
+    """
+    Keeps CourseProgressRollup in step with CourseCompletionStatusPerUser. Counts only move
+    through F() updates, so concurrent writers never overwrite each other.
+    """
+
+    def apply_delta(self, course_id, customer_id, status, delta):
+        if not delta:
+            return
+        rows = self.filter(course_id=course_id, customer_id=customer_id, status=status)
+        if rows.update(count=F('count') + delta, updated_at=now()):
+            return
+        if delta < 0:
+            # nothing counted yet, the row (or its course) is already gone
+            return
+        try:
+            with transaction.atomic():
+                self.create(course_id=course_id, customer_id=customer_id, status=status, count=delta)
+        except IntegrityError:
+            # created concurrently
+            rows.update(count=F('count') + delta, updated_at=now())
+
+    def apply_changes(self, changes):
+        """changes: {(course_id, customer_id, status): delta}"""
+        with transaction.atomic():
+            # a fixed order keeps concurrent writers from deadlocking on the row locks
+            for course_id, customer_id, status in sorted(changes):
+                self.apply_delta(course_id, customer_id, status, changes[(course_id, customer_id, status)])
+
+    def apply_state_change(self, previous, current):
+        """
+        previous/current: (course_id, enrolled_user_id, status, active) of one completion status
+        record before and after a write, None when it did not exist.
+        """
+        self.apply_state_changes([(previous, current)])
+
+    def apply_state_changes(self, state_changes):
+        """
+        Batch form of apply_state_change(), for bulk_create/update() paths that bypass
+        CourseCompletionStatusPerUser.save(). Call it in the transaction that did the write.
+        """
+        user_ids = {
+            state[1] for change in state_changes for state in change if state is not None
+        }
+        if not user_ids:
+            return
+        customer_ids = dict(User.objects.filter(id__in=user_ids).values_list('id', 'customer_id'))
+        changes = Counter()
+        for previous, current in state_changes:
+            for state, delta in ((previous, -1), (current, 1)):
+                if state is None or not state[3] or state[1] not in customer_ids:
+                    continue
+                changes[(state[0], customer_ids[state[1]], state[2])] += delta
+        self.apply_changes(changes)
+
+    def record_created(self, status_records):
+        """Count records inserted with bulk_create()."""
+        self.apply_state_changes([(None, record.get_rollup_state()) for record in status_records])
+
+    def rebuild(self):
+        """Recompute every row from CourseCompletionStatusPerUser, returns the number of rows."""
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # writers wait for the rebuild, so their deltas land on the rebuilt rows
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LOCK TABLE {self.model._meta.db_table} IN EXCLUSIVE MODE')
+            self.all().delete()
+            counts = (
+                CourseCompletionStatusPerUser.objects.filter(active=True)
+                .values('course_id', 'enrolled_user__customer_id', 'status')
+                .annotate(total=Count('id'))
+                .order_by()
+            )
+            rollups = [
+                self.model(
+                    course_id=row['course_id'],
+                    customer_id=row['enrolled_user__customer_id'],
+                    status=row['status'],
+                    count=row['total'],
+                )
+                for row in counts
+            ]
+            self.bulk_create(rollups, batch_size=1000)
+            return len(rollups)
+
+
+class CourseProgressRollup(models.Model):
+    """
+    Number of active CourseCompletionStatusPerUser records per course, customer and status.
+    Maintained on every save/delete of a completion status record, rebuilt from scratch
+    with `manage.py rebuild_progress_rollup`.
+    """
+    id = models.AutoField(primary_key=True)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress_rollups')
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='progress_rollups')
+    status = models.CharField(max_length=20, choices=CourseCompletionStatusPerUser.STATUS_CHOICES)
+    count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CourseProgressRollupManager()
+
+    class Meta:
+        db_table = 'course_progress_rollup'
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'customer', 'status'], name='unique_course_progress_rollup'),
+        ]
+
+
+class CourseProgressSnapshotManager(models.Manager):
+
+    def take_snapshot(self):
+        """
+        (Re)write today's snapshot rows; running it again the same day replaces them. Status
+        counts are read from CourseProgressRollup, which only holds the current counts, so a
+        snapshot can only be taken for the current date; attempts and average score cover the
+        quiz attempts completed today, each scored as a percentage of its questions like
+        QuizScoreManager does. Returns the number of rows written.
+        """
+        snapshot_date = timezone.localdate()
+        status_fields = {
+            CourseCompletionStatusPerUser.COMPLETED: 'completed',
+            CourseCompletionStatusPerUser.IN_PROGRESS: 'in_progress',
+            CourseCompletionStatusPerUser.NOT_STARTED: 'not_started',
+        }
+        with transaction.atomic():
+            self.filter(date=snapshot_date).delete()
+            snapshots = {}
+
+            def get_snapshot(course_id, customer_id):
+                key = (course_id, customer_id)
+                if key not in snapshots:
+                    snapshots[key] = self.model(date=snapshot_date, course_id=course_id, customer_id=customer_id)
+                return snapshots[key]
+
+            for rollup in CourseProgressRollup.objects.filter(count__gt=0).values('course_id', 'customer_id', 'status', 'count'):
+                snapshot = get_snapshot(rollup['course_id'], rollup['customer_id'])
+                setattr(snapshot, status_fields[rollup['status']], rollup['count'])
+
+            attempts = (
+                QuizAttemptHistory.objects.filter(complete=True, end__date=snapshot_date, course__isnull=False)
+                .values('course_id', 'enrolled_user__customer_id')
+                .annotate(attempts=Count('id'), avg_score=Avg(QuizAttemptHistory.percentage_expression()))
+                .order_by()
+            )
+            for attempt in attempts:
+                snapshot = get_snapshot(attempt['course_id'], attempt['enrolled_user__customer_id'])
+                snapshot.attempts = attempt['attempts']
+                snapshot.avg_score = round(attempt['avg_score'], 2)
+
+            self.bulk_create(snapshots.values(), batch_size=1000)
+            invalidate_dashboards()
+            return len(snapshots)
+
+
+class CourseProgressSnapshot(models.Model):
+    """
+    Daily per course and customer copy of the progress counts, for trend charts.
+    Written by `manage.py snapshot_progress`.
+    """
+    id = models.AutoField(primary_key=True)
+    date = models.DateField()
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='progress_snapshots')
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='progress_snapshots')
+    completed = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    not_started = models.IntegerField(default=0)
+    attempts = models.IntegerField(default=0) # quiz attempts completed that day
+    avg_score = models.DecimalField(max_digits=10, decimal_places=2, null=True) # mean percentage of those attempts
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CourseProgressSnapshotManager()
+
+    class Meta:
+        db_table = 'course_progress_snapshot'
+        constraints = [
+            # leading date column serves the date range reads of the trend endpoint
+            models.UniqueConstraint(fields=['date', 'course', 'customer'], name='unique_course_progress_snapshot'),
+        ]
+
+
+# dashboard cache invalidation (core/dashboard_cache.py); bulk_create()/update() callers
+# on these models invalidate explicitly
+@receiver([post_save, post_delete], sender=Course)
+def invalidate_course_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards(courses=True)
+
+@receiver([post_save, post_delete], sender=CourseRegisterRecord)
+def invalidate_registration_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards(customer_ids=[instance.customer_id])
+
+@receiver([post_save, post_delete], sender=CourseEnrollment)
+def invalidate_enrollment_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards_for_users([instance.user_id])
+
+@receiver([post_save, post_delete], sender=CourseCompletionStatusPerUser)
+def invalidate_completion_status_dashboards(sender, instance, **kwargs):
+    invalidate_dashboards_for_users([instance.enrolled_user_id])
+
+
+class QuizScoreManager(models.Manager):
+
+    def initialize(self, course_ids, user_ids, batch_size=1000):
+        """
+        Create an empty score for every enrolled (course, user) pair that has none.
+        Returns (created scores, {'created': n, 'skipped': n, 'invalid': n}); pairs created
+        concurrently after the check count as skipped.
+        """
+        pairs, counts = _split_pairs_to_initialize(self, course_ids, user_ids)
+        total_quizzes = self.count_course_quizzes({course_id for course_id, _ in pairs})
+        quiz_scores = [
+            self.model(
+                course_id=course_id,
+                enrolled_user_id=user_id,
+                total_quizzes_per_course=total_quizzes.get(course_id, 0),
+                completed_quiz_count=0,
+                total_score_per_course=0,
+                updated_at=now(),
+            )
+            for course_id, user_id in pairs
+        ]
+        with transaction.atomic():
+            quiz_scores = _create_missing(self, quiz_scores, batch_size)
+        counts['created'] = len(quiz_scores)
+        counts['skipped'] += len(pairs) - len(quiz_scores)
+        return quiz_scores, counts
+
+    def get_score_pairs(self, course_ids=None, user_ids=None):
+        """
+        (course_id, user_id) pairs to recompute: every combination when both lists are given,
+        otherwise the active enrollments and existing scores of the given courses or users.
+        """
+        if course_ids is not None and user_ids is not None:
+            return {(course_id, user_id) for course_id in course_ids for user_id in user_ids}
+        if course_ids is None and user_ids is None:
+            raise ValueError("course_ids or user_ids is required")
+        enrollments = CourseEnrollment.objects.filter(active=True)
+        scores = self.all()
+        if course_ids is not None:
+            enrollments = enrollments.filter(course_id__in=course_ids)
+            scores = scores.filter(course_id__in=course_ids)
+        else:
+            enrollments = enrollments.filter(user_id__in=user_ids)
+            scores = scores.filter(enrolled_user_id__in=user_ids)
+        return set(enrollments.values_list('course_id', 'user_id')) | set(scores.values_list('course_id', 'enrolled_user_id'))
+
+    def recompute(self, course_ids=None, user_ids=None, batch_size=1000):
+        """
+        Recompute completed_quiz_count, total_quizzes_per_course and total_score_per_course of
+        the pairs given by get_score_pairs from the quiz attempt history, creating missing
+        scores. Returns the number of pairs.
+        """
+        pairs = self.get_score_pairs(course_ids, user_ids)
+        if not pairs:
+            return 0
+        self.save_scores(self.compute_scores(pairs, filter_users=user_ids is not None), batch_size=batch_size)
+        return len(pairs)
+
+    def compute_scores(self, pairs, filter_users=True):
+        """
+        {(course_id, user_id): (completed_quiz_count, total_quizzes_per_course, total_score_per_course)}
+        for the pairs, read from the quiz attempt history; filter_users=False reads the attempts
+        of the whole courses, cheaper when the pairs cover them anyway.
+
+        A quiz counts with its latest completed attempt (one window query for all pairs); the
+        course score is the mean of those attempts' score / question count over the course's
+        active quizzes, as a percentage.
+        """
+        pair_course_ids = {course_id for course_id, _ in pairs}
+        total_quizzes = self.count_course_quizzes(pair_course_ids)
+
+        attempts = QuizAttemptHistory.objects.filter(complete=True, course_id__in=pair_course_ids)
+        if filter_users:
+            attempts = attempts.filter(enrolled_user_id__in={user_id for _, user_id in pairs})
+        question_count = Cardinality('question_list_order')
+        latest_attempt = {
+            'partition_by': [F('course_id'), F('enrolled_user_id'), F('quiz_id')],
+            'order_by': [F('created_at').desc(), F('id').desc()],
+        }
+        latest_attempts = (
+            attempts.annotate(
+                latest_score=Window(FirstValue('current_score'), **latest_attempt),
+                latest_question_count=Window(FirstValue(question_count), **latest_attempt),
+            )
+            .values('course_id', 'enrolled_user_id', 'quiz_id', 'latest_score', 'latest_question_count')
+            .order_by()
+            .distinct()
+        )
+        completed_quizzes = Counter()
+        score_totals = Counter()
+        for attempt in latest_attempts:
+            pair = (attempt['course_id'], attempt['enrolled_user_id'])
+            completed_quizzes[pair] += 1
+            if attempt['latest_question_count']:
+                score_totals[pair] += attempt['latest_score'] / attempt['latest_question_count']
+
+        return {
+            pair: self.build_score(completed_quizzes[pair], total_quizzes.get(pair[0], 0), score_totals[pair])
+            for pair in pairs
+        }
+
+    @staticmethod
+    def build_score(completed_quiz_count, total_quizzes, score_fraction_total):
+        """
+        (completed_quiz_count, total_quizzes_per_course, total_score_per_course) from the sum
+        of the counted attempts' score / question count.
+        """
+        score = round(score_fraction_total / total_quizzes * 100.0, 2) if total_quizzes > 0 else 0
+        return completed_quiz_count, total_quizzes, Decimal(str(score))
+
+    @staticmethod
+    def count_course_quizzes(course_ids):
+        """
+        {course_id: number of active, not deleted quizzes}, courses without any are left out.
+        The one definition of total_quizzes_per_course, used by every path that writes it.
+        """
+        return dict(
+            CourseStructure.objects.filter(course_id__in=course_ids, content_type='quiz', active=True, deleted_at__isnull=True)
+            .values('course_id')
+            .annotate(total=Count('id'))
+            .values_list('course_id', 'total')
+            .order_by()
+        )
+
+    def save_scores(self, scores, batch_size=1000):
+        """Write compute_scores() results, updating existing rows and creating missing ones."""
+        fields = ('completed_quiz_count', 'total_quizzes_per_course', 'total_score_per_course')
+        with transaction.atomic():
+            to_update = []
+            existing = self.filter(
+                course_id__in={course_id for course_id, _ in scores},
+                enrolled_user_id__in={user_id for _, user_id in scores},
+            )
+            for quiz_score in existing.only('id', 'course_id', 'enrolled_user_id'):
+                pair = (quiz_score.course_id, quiz_score.enrolled_user_id)
+                if pair in scores:
+                    for field, value in zip(fields, scores[pair]):
+                        setattr(quiz_score, field, value)
+                    quiz_score.updated_at = now()
+                    to_update.append(quiz_score)
+            self.bulk_update(to_update, [*fields, 'updated_at'], batch_size=batch_size)
+
+            existing_pairs = {(quiz_score.course_id, quiz_score.enrolled_user_id) for quiz_score in to_update}
+            self.bulk_create(
+                [
+                    self.model(course_id=pair[0], enrolled_user_id=pair[1], **dict(zip(fields, values)))
+                    for pair, values in scores.items()
+                    if pair not in existing_pairs
+                ],
+                batch_size=batch_size,
+            )
+
+    def apply_completed_attempt(self, attempt):
+        """
+        Fold a newly completed attempt into its QuizScore with one F() UPDATE, then move the
+        learner's completion status along. A missing score is computed with recompute().
+        The stored percentage is rounded on every update and can drift from recompute();
+        `manage.py reconcile_scores` realigns it.
+
+        Only attempts of exam paper quizzes are kept once completed (QuizTake deletes the
+        others), so only those count, as in recompute() and the rebuild commands.
+        """
+        if not attempt.quiz.exam_paper:
+            return
+        pair = (attempt.course_id, attempt.enrolled_user_id)
+        with transaction.atomic():
+            # lock the score first: a concurrent completion of another attempt of the same
+            # quiz waits here, then sees this one as its previous attempt
+            score_ids = list(
+                self.select_for_update().filter(course_id=pair[0], enrolled_user_id=pair[1]).values_list('id', flat=True)
+            )
+            if not score_ids:
+                # the attempt is already marked complete, recompute() counts it
+                self.recompute(course_ids=[pair[0]], user_ids=[pair[1]])
+            elif not self._fold_attempt(attempt, score_ids):
+                return
+
+            counters = self.filter(course_id=pair[0], enrolled_user_id=pair[1]).values_list(
+                'completed_quiz_count', 'total_quizzes_per_course'
+            ).first()
+            CourseCompletionStatusPerUser.objects.set_statuses(
+                {pair: CourseCompletionStatusPerUser.derive_status(*counters)}
+            )
+
+    def _fold_attempt(self, attempt, score_ids):
+        """
+        apply_completed_attempt's F() UPDATE of the locked score rows; returns False, without
+        writing, when a later completed attempt of the same quiz is the one that counts.
+        """
+        previous = (
+            QuizAttemptHistory.objects.filter(
+                course_id=attempt.course_id,
+                enrolled_user_id=attempt.enrolled_user_id,
+                quiz_id=attempt.quiz_id,
+                complete=True,
+            )
+            .exclude(pk=attempt.pk)
+            .only('id', 'created_at', 'current_score', 'question_list_order')
+            .order_by('-created_at', '-id')
+            .first()
+        )
+        if previous is not None and (previous.created_at, previous.id) > (attempt.created_at, attempt.id):
+            # a later attempt of this quiz is the one that counts
+            return False
+
+        def score_fraction(quiz_attempt):
+            max_score = quiz_attempt.get_max_score
+            return quiz_attempt.current_score / max_score if max_score else 0
+
+        score_delta = score_fraction(attempt) - (score_fraction(previous) if previous is not None else 0)
+        score_field = DecimalField(max_digits=10, decimal_places=2)
+        self.filter(id__in=score_ids).update(
+            completed_quiz_count=F('completed_quiz_count') + (1 if previous is None else 0),
+            total_score_per_course=Case(
+                When(
+                    total_quizzes_per_course__gt=0,
+                    then=ExpressionWrapper(
+                        F('total_score_per_course')
+                        + Value(score_delta * 100.0, output_field=FloatField()) / F('total_quizzes_per_course'),
+                        output_field=score_field,
+                    ),
+                ),
+                default=F('total_score_per_course'),
+                output_field=score_field,
+            ),
+            updated_at=now(),
+        )
+        return True
+
+
 class QuizScore(models.Model):
     """
         get instance made when course enrollment table is populated
@@ -771,5 +1649,170 @@ class QuizScore(models.Model):
     updated_at = models.DateTimeField(auto_now=True, auto_now_add=False, null=True)
     deleted_at = models.DateTimeField(null=True)
     active = models.BooleanField(default=True)
+
+    objects = QuizScoreManager()
+
+    class Meta:
+        db_table = 'quiz_score'
+        constraints = [
+            models.UniqueConstraint(fields=['enrolled_user', 'course'], name='unique_quiz_score_user'),
+        ]
+
+
+class ScoreJobManager(models.Manager):
+
+    def enqueue(self, kind, pairs):
+        """
+        Queue a `kind` job for every (course_id, user_id) pair. A pair that already has a job
+        of that kind waiting for its first run shares it. Returns the jobs, in the pairs' order.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        with transaction.atomic():
+            # the unique_pending_score_job constraint drops the duplicates
+            self.bulk_create(
+                [self.model(kind=kind, course_id=course_id, user_id=user_id) for course_id, user_id in pairs],
+                batch_size=1000,
+                ignore_conflicts=True,
+            )
+            jobs = {}
+            for job in self.filter(
+                kind=kind,
+                course_id__in={course_id for course_id, _ in pairs},
+                user_id__in={user_id for _, user_id in pairs},
+                status__in=[self.model.PENDING, self.model.RUNNING],
+            ).order_by('id'):
+                # the newest job of a pair is the one that will see the latest data
+                jobs[(job.course_id, job.user_id)] = job
+        return [jobs[pair] for pair in pairs if pair in jobs]
+
+    def claim(self, limit):
+        """
+        Mark up to `limit` due jobs running and return them. SELECT ... FOR UPDATE SKIP LOCKED
+        lets concurrent workers claim disjoint jobs without waiting on each other. Running jobs
+        whose worker did not finish them within SCORE_JOB_LEASE_TIMEOUT are due again.
+        """
+        current_time = now()
+        lease_expired = current_time - datetime.timedelta(seconds=settings.SCORE_JOB_LEASE_TIMEOUT)
+        with transaction.atomic():
+            jobs = list(
+                self.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=self.model.PENDING, run_after__lte=current_time)
+                    | Q(status=self.model.RUNNING, started_at__lt=lease_expired)
+                )
+                .order_by('run_after', 'id')[:limit]
+            )
+            self.filter(id__in=[job.id for job in jobs]).update(
+                status=self.model.RUNNING, started_at=current_time, attempts=F('attempts') + 1
+            )
+        for job in jobs:
+            job.status = self.model.RUNNING
+            job.started_at = current_time
+            job.attempts += 1
+        return jobs
+
+    def run_batch(self, limit=100):
+        """
+        Claim up to `limit` jobs and run them, one set-based recomputation per kind.
+        Returns the number of jobs claimed.
+        """
+        jobs = self.claim(limit)
+        jobs_by_kind = {}
+        for job in jobs:
+            jobs_by_kind.setdefault(job.kind, []).append(job)
+        for kind, kind_jobs in jobs_by_kind.items():
+            pairs = {(job.course_id, job.user_id) for job in kind_jobs}
+            try:
+                with transaction.atomic():
+                    if kind == self.model.QUIZ_SCORE:
+                        QuizScore.objects.save_scores(QuizScore.objects.compute_scores(pairs))
+                    else:
+                        CourseCompletionStatusPerUser.objects.update_from_scores(pairs)
+                    self.filter(id__in=[job.id for job in kind_jobs]).update(
+                        status=self.model.DONE, finished_at=now(), last_error=''
+                    )
+            except Exception as e:
+                self.retry_or_fail(kind_jobs, e)
+        return len(jobs)
+
+    def retry_or_fail(self, jobs, error):
+        """
+        Put the jobs back in the queue after SCORE_JOB_RETRY_DELAY * 2 ** (attempts - 1)
+        seconds, or fail them once they have had SCORE_JOB_MAX_ATTEMPTS attempts.
+        """
+        current_time = now()
+        for job in jobs:
+            job.last_error = f'{type(error).__name__}: {error}'
+            if job.attempts >= settings.SCORE_JOB_MAX_ATTEMPTS:
+                job.status = self.model.FAILED
+                job.finished_at = current_time
+            else:
+                job.status = self.model.PENDING
+                job.run_after = current_time + datetime.timedelta(
+                    seconds=settings.SCORE_JOB_RETRY_DELAY * 2 ** (job.attempts - 1)
+                )
+        self.bulk_update(jobs, ['status', 'run_after', 'finished_at', 'last_error'])
+
+    def purge(self, older_than):
+        """Delete jobs that finished before `older_than`, returns how many."""
+        deleted, _ = self.filter(status__in=[self.model.DONE, self.model.FAILED], finished_at__lt=older_than).delete()
+        return deleted
+
+
+class ScoreJob(models.Model):
+    """
+    Queued recomputation of one user's QuizScore or completion status for a course, run by
+    `manage.py run_score_jobs` instead of inside a request.
+    """
+    QUIZ_SCORE = 'quiz_score'
+    COMPLETION_STATUS = 'completion_status'
+    KIND_CHOICES = [
+        (QUIZ_SCORE, 'Quiz Score'),
+        (COMPLETION_STATUS, 'Completion Status'),
+    ]
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='score_jobs')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='score_jobs')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    run_after = models.DateTimeField(default=now)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    objects = ScoreJobManager()
+
     class Meta:
-        db_table = 'quiz_score'
\ No newline at end of file
+        db_table = 'score_job'
+        indexes = [
+            # the workers' claim query
+            models.Index(fields=['status', 'run_after'], name='score_job_due_idx'),
+        ]
+        constraints = [
+            # coalesces requests for a pair while its job waits; retried jobs (attempts > 0)
+            # are left out, so a new request after a failure still queues a fresh job
+            models.UniqueConstraint(
+                fields=['kind', 'course', 'user'],
+                condition=Q(status='pending', attempts=0),
+                name='unique_pending_score_job',
+            ),
+        ]
+
+
+@receiver(quiz_attempt_completed, sender=QuizAttemptHistory)
+def update_scores_on_quiz_completion(sender, attempt, **kwargs):
+    if attempt.course_id is not None:
+        QuizScore.objects.apply_completed_attempt(attempt)
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 from django.utils.timezone import now
 
@@ -43,6 +45,15 @@ class User(models.Model):
     class Meta:
         db_table = 'users'
 
+    @property
+    def is_active(self):
+        return self.status == 'active'
+
+    @property
+    def is_authenticated(self):
+        # instances are only ever handed out by the authenticator, for DRF throttles and permissions
+        return True
+
 
 class UserRolePrivileges(models.Model):
     id = models.AutoField(primary_key=True)
@@ -67,6 +78,24 @@ class Resources(models.Model):
         verbose_name_plural = 'Resources'
 
 
+@receiver([post_save, post_delete], sender=UserRolePrivileges)
+def invalidate_role_privileges(sender, instance, **kwargs):
+    from core.privilege_resolver import privilege_resolver
+    role_id = instance.role_id
+    transaction.on_commit(lambda: privilege_resolver.invalidate(role_id))
+
+@receiver([post_save, post_delete], sender=Resources)
+def invalidate_all_role_privileges(sender, instance, **kwargs):
+    from core.privilege_resolver import privilege_resolver
+    transaction.on_commit(privilege_resolver.invalidate)
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_customer_dashboards(sender, instance, **kwargs):
+    # active user counts on the client admin dashboard
+    from core.dashboard_cache import invalidate_dashboards
+    invalidate_dashboards(customer_ids=[instance.customer_id])
+
+
 class CustomerResources(models.Model):
     id = models.AutoField(primary_key=True)
     resource = models.ForeignKey('Resources', on_delete=models.CASCADE, related_name='customer_resource')
@@ -2,6 +2,7 @@ from rest_framework import serializers
 from backend.models.allmodels import (
     Choice,
     Course, 
+    CourseQuerySet,
     CourseStructure, 
     Question, 
     Quiz, 
@@ -39,6 +40,39 @@ class CourseDisplaySerializer(serializers.ModelSerializer):
         ordering = ['-updated_at']
 
 
+class CourseStatisticsDisplaySerializer(CourseDisplaySerializer):
+    """
+    Course listing entry with the counts annotated by Course.objects.with_statistics().
+    """
+    active_registration_count = serializers.IntegerField(read_only=True)
+    active_enrollment_count = serializers.IntegerField(read_only=True)
+    completion_count = serializers.IntegerField(read_only=True)
+    in_progress_count = serializers.IntegerField(read_only=True)
+    not_started_count = serializers.IntegerField(read_only=True)
+
+    class Meta(CourseDisplaySerializer.Meta):
+        fields = CourseDisplaySerializer.Meta.fields + list(CourseQuerySet.STATISTICS)
+
+
+class CourseStatisticsOrderingSerializer(serializers.Serializer):
+    """
+    ?ordering= of course listings annotated with statistics: a count name, or title/created_at,
+    prefixed with '-' for descending order.
+    """
+    ordering = serializers.CharField(required=False)
+
+    def validate_ordering(self, value):
+        """
+        Ensure that ordering names one of the sortable fields.
+        """
+        allowed = set(CourseQuerySet.STATISTICS) | {'title', 'created_at', 'id'}
+        if value.lstrip('-') not in allowed:
+            raise serializers.ValidationError(
+                "ordering must be one of {} (prefix '-' for descending)".format(', '.join(sorted(allowed)))
+            )
+        return value
+
+
 class ActiveCourseDisplaySerializer(serializers.ModelSerializer):
     """
     Serializer for Course model.
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from backend.models.allmodels import CourseCompletionStatusPerUser
-from backend.models.allmodels import QuizScore
+from backend.models.allmodels import QuizScore, ScoreJob
 
 class CourseCompletionStatusSerializer(serializers.ModelSerializer):
     enrolled_user_id = serializers.IntegerField()
@@ -28,6 +28,17 @@ class CourseCompletionStatusSerializer(serializers.ModelSerializer):
         return data
 
 
+class CourseCompletionStatusResultSerializer(serializers.Serializer):
+    """
+    Outcome of one (course, user) pair of a batch completion status update.
+    """
+    RESULTS = ('created', 'updated', 'unchanged', 'quiz_score_not_found')
+
+    course_id = serializers.IntegerField()
+    user_id = serializers.IntegerField()
+    status = serializers.CharField(allow_null=True)
+    result = serializers.ChoiceField(choices=RESULTS)
+
 
 class QuizScoreSerializer(serializers.ModelSerializer):
     enrolled_user_id = serializers.IntegerField()
@@ -60,4 +71,34 @@ class QuizScoreSerializer(serializers.ModelSerializer):
         if total_score_per_course is not None and total_score_per_course < 0:
             raise serializers.ValidationError("Total score per course must be a non-negative number")
 
-        return data
\ No newline at end of file
+        return data
+
+
+class ScoreJobSerializer(serializers.ModelSerializer):
+    course_id = serializers.IntegerField()
+    user_id = serializers.IntegerField()
+
+    class Meta:
+        model = ScoreJob
+        fields = ['id', 'kind', 'course_id', 'user_id', 'status', 'attempts', 'run_after', 'last_error', 'created_at', 'finished_at']
+
+
+class ScoreJobQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the score job status endpoint.
+    """
+    ids = serializers.CharField()
+
+    def validate_ids(self, value):
+        """
+        Parse the comma separated job ids.
+        """
+        try:
+            ids = [int(job_id) for job_id in value.split(',') if job_id.strip()]
+        except ValueError:
+            raise serializers.ValidationError("ids must be comma separated integers.")
+        if not ids:
+            raise serializers.ValidationError("At least one job id is required.")
+        if len(ids) > 1000:
+            raise serializers.ValidationError("At most 1000 job ids can be queried at once.")
+        return ids
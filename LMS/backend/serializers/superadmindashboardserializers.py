@@ -1,3 +1,5 @@
+import datetime
+from django.utils import timezone
 from rest_framework import serializers
 
 class ActiveCourseCountSerializer(serializers.Serializer):
@@ -40,4 +42,82 @@ class ActiveRegistrationCountSerializer(serializers.Serializer):
         """
         if value < 0:
             raise serializers.ValidationError("Active Registration count cannot be negative.")
-        return value
\ No newline at end of file
+        return value
+
+class ProgressPerCourseFilterSerializer(serializers.Serializer):
+    """
+    Optional query parameters of the progress per course graph.
+    """
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    customer_id = serializers.IntegerField(required=False)
+
+    def validate_customer_id(self, value):
+        """
+        Ensure that customer_id is a positive integer.
+        """
+        if value <= 0:
+            raise serializers.ValidationError("Customer ID must be a positive integer")
+        return value
+
+    def validate(self, data):
+        """
+        Validate that the date range is not reversed.
+        """
+        start_date = data.get('start_date')
+        end_date = data.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError("start_date must be on or before end_date.")
+        return data
+
+
+DASHBOARD_WIDGETS = ('registration_count', 'registrations_per_course', 'progress_per_course', 'course_count')
+
+
+class DashboardBundleSerializer(ProgressPerCourseFilterSerializer):
+    """
+    Query parameters of the super admin dashboard bundle.
+    """
+    widgets = serializers.CharField(required=False)
+
+    def validate_widgets(self, value):
+        """
+        Parse the comma separated widget names, keeping the order of DASHBOARD_WIDGETS.
+        """
+        requested = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = requested - set(DASHBOARD_WIDGETS)
+        if unknown:
+            raise serializers.ValidationError(
+                "Unknown widget(s): {}. Choose from {}.".format(', '.join(sorted(unknown)), ', '.join(DASHBOARD_WIDGETS))
+            )
+        if not requested:
+            raise serializers.ValidationError("At least one widget is required.")
+        return [name for name in DASHBOARD_WIDGETS if name in requested]
+
+    def validate(self, data):
+        data = super().validate(data)
+        data.setdefault('widgets', list(DASHBOARD_WIDGETS))
+        return data
+
+
+class ProgressTrendSerializer(serializers.Serializer):
+    """
+    Query parameters of the progress trend graph.
+    """
+    BUCKETS = ('day', 'week', 'month')
+
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+    bucket = serializers.ChoiceField(choices=BUCKETS, default='day')
+    course_id = serializers.IntegerField(required=False, min_value=1)
+    customer_id = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, data):
+        """
+        Default to the last 30 days and validate that the date range is not reversed.
+        """
+        end_date = data.setdefault('end_date', timezone.localdate())
+        start_date = data.setdefault('start_date', end_date - datetime.timedelta(days=30))
+        if start_date > end_date:
+            raise serializers.ValidationError("start_date must be on or before end_date.")
+        return data
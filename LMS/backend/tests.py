@@ -1,3 +1,197 @@
-from django.test import TestCase
+import datetime
+import importlib
+import json
+from types import SimpleNamespace
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.timezone import now
+from backend.models.allmodels import Choice, Course, Question, Quiz, QuizAttemptHistory, ScoreJob
+from backend.models.coremodels import Customer, Role, User
 
-# Create your tests here.
+
+def create_user(email):
+    customer = Customer.objects.create(name=f'customer {email}', email=f'customer-{email}')
+    role = Role.objects.create(name='learner', customer=customer)
+    return User.objects.create(first_name='learner', email=email, customer=customer, created_by=role)
+
+
+class ScoreJobQueueTests(TestCase):
+
+    def setUp(self):
+        self.course = Course.objects.create(title='course', active=True)
+        self.users = [create_user(f'learner-{i}@example.invalid') for i in range(2)]
+        self.jobs = ScoreJob.objects.enqueue(
+            ScoreJob.QUIZ_SCORE, [(self.course.id, user.id) for user in self.users]
+        )
+
+    def test_enqueue_shares_a_pending_job(self):
+        again = ScoreJob.objects.enqueue(ScoreJob.QUIZ_SCORE, [(self.course.id, self.users[0].id)])
+        self.assertEqual([job.id for job in again], [self.jobs[0].id])
+        self.assertEqual(ScoreJob.objects.count(), 2)
+
+    def test_claim_takes_due_jobs_once(self):
+        ScoreJob.objects.filter(id=self.jobs[1].id).update(run_after=now() + datetime.timedelta(hours=1))
+
+        claimed = ScoreJob.objects.claim(10)
+
+        self.assertEqual([job.id for job in claimed], [self.jobs[0].id])
+        job = ScoreJob.objects.get(id=self.jobs[0].id)
+        self.assertEqual(job.status, ScoreJob.RUNNING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIsNotNone(job.started_at)
+        self.assertEqual(ScoreJob.objects.claim(10), [])
+
+    def test_claim_respects_limit(self):
+        self.assertEqual(len(ScoreJob.objects.claim(1)), 1)
+        self.assertEqual(len(ScoreJob.objects.claim(1)), 1)
+        self.assertEqual(ScoreJob.objects.claim(1), [])
+
+    @override_settings(SCORE_JOB_LEASE_TIMEOUT=600)
+    def test_claim_takes_back_an_expired_lease(self):
+        ScoreJob.objects.claim(10)
+        ScoreJob.objects.filter(id=self.jobs[0].id).update(started_at=now() - datetime.timedelta(seconds=601))
+
+        claimed = ScoreJob.objects.claim(10)
+
+        self.assertEqual([job.id for job in claimed], [self.jobs[0].id])
+        self.assertEqual(ScoreJob.objects.get(id=self.jobs[0].id).attempts, 2)
+
+    @override_settings(SCORE_JOB_MAX_ATTEMPTS=2, SCORE_JOB_RETRY_DELAY=30)
+    def test_retry_or_fail_backs_off_then_fails(self):
+        ScoreJob.objects.filter(id=self.jobs[1].id).delete()
+        before = now()
+        ScoreJob.objects.retry_or_fail(ScoreJob.objects.claim(10), ValueError('boom'))
+
+        job = ScoreJob.objects.get(id=self.jobs[0].id)
+        self.assertEqual(job.status, ScoreJob.PENDING)
+        self.assertEqual(job.last_error, 'ValueError: boom')
+        self.assertGreaterEqual(job.run_after, before + datetime.timedelta(seconds=30))
+        # not due before the delay
+        self.assertEqual(ScoreJob.objects.claim(10), [])
+
+        ScoreJob.objects.filter(id=job.id).update(run_after=now())
+        ScoreJob.objects.retry_or_fail(ScoreJob.objects.claim(10), ValueError('boom again'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, ScoreJob.FAILED)
+        self.assertEqual(job.attempts, 2)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(ScoreJob.objects.claim(10), [])
+
+
+class FakeAttemptManager:
+    """Just enough of a manager for the 0011 data migration functions."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.updated_fields = []
+
+    def only(self, *fields):
+        return self
+
+    def order_by(self, *fields):
+        return self
+
+    def iterator(self, chunk_size=None):
+        return iter(self.rows)
+
+    def bulk_update(self, objs, fields):
+        self.updated_fields.append(fields)
+
+
+class StructuredQuizAttemptMigrationTests(SimpleTestCase):
+    migration = importlib.import_module('backend.migrations.0011_structured_quiz_attempt')
+
+    def run_migration_function(self, function, rows):
+        manager = FakeAttemptManager(rows)
+        apps = SimpleNamespace(get_model=lambda app_label, model_name: SimpleNamespace(objects=manager))
+        function(apps, None)
+        return manager
+
+    def test_csv_to_arrays_and_back(self):
+        row = SimpleNamespace(
+            id=1,
+            question_list_order='4,8,15,16,',
+            unattempted_question='15,16,',
+            incorrect_questions='8,',
+            user_answers=json.dumps({'4': '11', '8': '20'}),
+        )
+        manager = self.run_migration_function(self.migration.to_structured, [row])
+
+        self.assertEqual(row.question_ids, [4, 8, 15, 16])
+        self.assertEqual(row.question_cursor, 2)
+        self.assertEqual(row.incorrect_question_ids, [8])
+        self.assertEqual(row.answers, {'4': '11', '8': '20'})
+        self.assertEqual(manager.updated_fields, [['question_ids', 'question_cursor', 'incorrect_question_ids', 'answers']])
+
+        for field in ('question_list_order', 'unattempted_question', 'incorrect_questions', 'user_answers'):
+            setattr(row, field, None)
+        self.run_migration_function(self.migration.to_text, [row])
+
+        self.assertEqual(row.question_list_order, '4,8,15,16,')
+        self.assertEqual(row.unattempted_question, '15,16,')
+        self.assertEqual(row.incorrect_questions, '8,')
+        self.assertEqual(json.loads(row.user_answers), {'4': '11', '8': '20'})
+
+    def test_empty_and_malformed_values(self):
+        row = SimpleNamespace(
+            id=2, question_list_order='', unattempted_question='', incorrect_questions='', user_answers='not json'
+        )
+        self.run_migration_function(self.migration.to_structured, [row])
+
+        self.assertEqual(row.question_ids, [])
+        self.assertEqual(row.question_cursor, 0)
+        self.assertEqual(row.incorrect_question_ids, [])
+        self.assertEqual(row.answers, {})
+
+    def test_finished_sitting_has_cursor_at_end(self):
+        row = SimpleNamespace(
+            id=3, question_list_order='1,2,', unattempted_question='', incorrect_questions='', user_answers='{}'
+        )
+        self.run_migration_function(self.migration.to_structured, [row])
+        self.assertEqual(row.question_cursor, 2)
+
+
+class SubmitAnswerTests(TestCase):
+
+    def setUp(self):
+        self.user = create_user('taker@example.invalid')
+        self.course = Course.objects.create(title='course', active=True)
+        self.quiz = Quiz.objects.create(title='quiz', exam_paper=True)
+        self.questions = []
+        for i in range(2):
+            question = Question.objects.create(content=f'question {i}')
+            question.quizzes.add(self.quiz)
+            Choice.objects.create(question=question, choice='right', correct=True)
+            Choice.objects.create(question=question, choice='wrong', correct=False)
+            self.questions.append(question)
+        self.sitting = QuizAttemptHistory.objects.new_sitting(self.user, self.quiz, self.course)
+
+    def test_answers_advance_the_sitting(self):
+        first = self.sitting.get_first_question()
+        self.assertTrue(self.sitting.submit_answer(first, 'a', True))
+        second = self.sitting.get_first_question()
+        self.assertTrue(self.sitting.submit_answer(second, 'b', False))
+
+        stored = QuizAttemptHistory.objects.get(pk=self.sitting.pk)
+        self.assertEqual(stored.question_cursor, 2)
+        self.assertEqual(stored.current_score, 1)
+        self.assertEqual(stored.incorrect_questions, [second.id])
+        self.assertEqual(stored.user_answers, {str(first.id): 'a', str(second.id): 'b'})
+        self.assertFalse(stored.has_unattempted_questions)
+        self.assertEqual(stored.progress(), (2, 2))
+
+    def test_double_submit_is_counted_once(self):
+        stale = QuizAttemptHistory.objects.get(pk=self.sitting.pk)
+        question = self.sitting.get_first_question()
+
+        self.assertTrue(self.sitting.submit_answer(question, 'a', True))
+        # the same form posted again, from a copy loaded before the first answer
+        self.assertFalse(stale.submit_answer(question, 'a', True))
+
+        stored = QuizAttemptHistory.objects.get(pk=self.sitting.pk)
+        self.assertEqual(stored.question_cursor, 1)
+        self.assertEqual(stored.current_score, 1)
+        self.assertEqual(stored.user_answers, {str(question.id): 'a'})
+        # the stale copy now reflects the stored row
+        self.assertEqual(stale.question_cursor, 1)
+        self.assertEqual(stale.current_score, 1)
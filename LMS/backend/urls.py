@@ -13,6 +13,8 @@ from .views.superadmindashboardviews import (
     CountOfActiveRegistrationPerCoure, 
     CourseCountView,
     GraphOfProgressPerCourseView, 
+    ProgressTrendView,
+    SuperAdminDashboardBundleView,
 )
 
 from .views.clientdashboardviews import (
@@ -30,6 +32,7 @@ from .views.scoreviews import (
     CourseCompletionStatusView,
     QuizScoreView,
     QuizScorePerCourseView,
+    ScoreJobView,
     CourseCompletionStatusPerUserView,
 )
 
@@ -57,6 +60,7 @@ from .views.quizcontentviews import (
     QuestionView,
     QuizTake,
 )
+from .views.metricsviews import MetricsView
 from .views.enrollcourseviews import( 
    CourseEnrollmentView,
     DisplayCourseListView,
@@ -90,10 +94,13 @@ urlpatterns = [
     path('dashboard/sa/active_registration-per-course/count/', CountOfActiveRegistrationPerCoure.as_view(), name='active_registration-per-course-count'),  #14
     path('dashboard/sa/progress-per-course/count/', GraphOfProgressPerCourseView.as_view(), name='not_started-per-course-count'),  #15
     path('dashboard/sa/course/count/', CourseCountView.as_view(), name='course-count'),  #16
+    path('dashboard/sa/bundle/', SuperAdminDashboardBundleView.as_view(), name='dashboard-bundle'),
+    path('dashboard/sa/progress-trend/', ProgressTrendView.as_view(), name='progress-trend'),
     
     path('course-completion-status/', CourseCompletionStatusView.as_view(), name='course_completion_status'),
     path('quiz-score/', QuizScoreView.as_view(), name='quiz_score'),
     path('quiz-score-per-course/',QuizScorePerCourseView.as_view(), name='quiz_score_per_course'),
+    path('score-jobs/', ScoreJobView.as_view(), name='score_jobs'),
     path('course-completion-status-per-user/', CourseCompletionStatusPerUserView.as_view(), name='course_completion_status_per_user'),
     path('display-client-course-progress/', DisplayClientCourseProgressView.as_view(), name='display_client_course_progress'),
     path('count-courses-status/', CountCoursesStatusView.as_view(), name='count_client_completed_courses'),
@@ -111,4 +118,6 @@ urlpatterns = [
     path('display/users/', UserListForEnrollmentView.as_view(), name='users-list'), 
     path('course-enrollments/', CourseEnrollmentView.as_view(), name='course-enrollments-record'), 
     path('manage-enrollment/', ManageCourseEnrollmentView.as_view(), name='manage_enrollment'),
+
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -14,6 +14,8 @@ from rest_framework.views import APIView
 from backend.models.coremodels import Customer, User
 from core.custom_mixins import ClientAdminMixin
 from core.custom_permissions import ClientAdminPermission
+from core.access_context import get_access_context
+from core.dashboard_cache import dashboard_cache
 from rest_framework import serializers
 from backend.serializers.clientadmindashboard import ActiveEnrolledUserCountSerializer, ProgressDataSerializer, RegisteredCourseCountSerializer  # Import your serializer
 
@@ -23,7 +25,6 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from backend.models.allmodels import (
-    Course,
     CourseCompletionStatusPerUser,
     CourseEnrollment,
     CourseRegisterRecord,
@@ -32,6 +33,7 @@ from rest_framework.exceptions import NotFound, ValidationError
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404, render, redirect
 from django.utils.decorators import method_decorator
+from django.db.models import Count, Exists, F, OuterRef, Q
 
 # to be taken from anuj and lavanya
 # =================================================================
@@ -113,7 +115,7 @@ class DisplayClientCourseProgressView(APIView):
         display:
             completed_quiz_count
     """
-    pass
+    query_budget = 3
 
 class DisplayClientCourseCompletionStatusView(APIView):
     """
@@ -149,6 +151,7 @@ class ActiveEnrolledUserCountPerCustomerView(APIView):
     Get API for counting active enrolled users per customer ID.
     """
     permission_classes = [ClientAdminPermission]
+    query_budget = 4
     def get(self, request):
         try:
 
@@ -156,7 +159,11 @@ class ActiveEnrolledUserCountPerCustomerView(APIView):
             serializer.is_valid(raise_exception=True)
             customer_id = serializer.validated_data.get('customer_id')
             # Retrieve the customer ID from the request query parameters
-            user_count = User.objects.filter(customer_id=customer_id, status='active').count()
+            user_count = dashboard_cache.get_or_compute(
+                'active_user_count',
+                lambda: User.objects.filter(customer_id=customer_id, status='active').count(),
+                customer_id=customer_id
+            )
             # Return the count in the response
             return Response({"user_count": user_count}, status=status.HTTP_200_OK)
         except (serializers.ValidationError, Exception) as e:
@@ -170,17 +177,22 @@ class RegisteredCourseCountView(APIView):
     Get API for client admin to count registered active courses per customer ID.
     """
     permission_classes = [ClientAdminPermission]
+    query_budget = 4
     def get(self, request):
         try:
             serializer = RegisteredCourseCountSerializer(data=request.query_params)
             serializer.is_valid(raise_exception=True)
             # Extract customer ID from request query parameters
             customer_id = serializer.validated_data.get('customer_id')
-            registered_course_counts = CourseRegisterRecord.objects.filter(
-                customer_id=customer_id, 
-                active=True,  # Only active registrations
-                course__active=True  # Only active courses
-            ).values('course').distinct().count()
+            registered_course_counts = dashboard_cache.get_or_compute(
+                'registered_course_count',
+                lambda: CourseRegisterRecord.objects.filter(
+                    customer_id=customer_id, 
+                    active=True,  # Only active registrations
+                    course__active=True  # Only active courses
+                ).values('course').distinct().count(),
+                customer_id=customer_id
+            )
             # Your existing logic to count registered active courses per customer ID
             response_data = {
                 'active_course_count': registered_course_counts
@@ -206,42 +218,48 @@ class ProgressCountView(APIView):
     API endpoint to get the count of users in different progress states for each registered course.
     """
     permission_classes = [ClientAdminPermission]
+    query_budget = 4
     def get(self, request):
         try:
-            user= request.data.get('user')
-            # we used courseerollment table to start the query of users so that query is made on the courses and users which are active and actively enrolled respectively.
-            active_enrolled = CourseEnrollment.objects.filter(user__customer__id = user['customer'], active = True).values_list('user', flat=True).distinct()
-            active_enrolled_ids = list(active_enrolled.values_list('user', flat=True))
-            
-            if not active_enrolled_ids:
+            customer_id = get_access_context(request).customer_id
+            progress_data = dashboard_cache.get_or_compute(
+                'progress_count', lambda: self.count_progress(customer_id), customer_id=customer_id
+            )
+            if progress_data is None:
                 # Handle the case where there are no active enrolled users
                 return Response({'error': 'No active enrolled users found'}, status=status.HTTP_404_NOT_FOUND)
-            
-            records = CourseCompletionStatusPerUser.objects.filter(active=True, enrolled_user__in=active_enrolled_ids,deleted_at__isnull=True)
-            
-            active_course_ids = records.values_list('course', flat=True).distinct()
-            active_courses = Course.objects.filter(id__in=active_course_ids, active=True, deleted_at__isnull=True)
-            print(active_courses)
-            progress_data = []
-            for course in active_courses:
-                course_title = course.title
-                status_values = ["completed", "in_progress", "not_started"]
-                counts = {status: records.filter(
-                                course=course, 
-                                status=status, 
-                                active=True, 
-                                enrolled_user__customer__id=user['customer']
-                            ).count() for status in status_values}
-
-                progress_data.append({
-                    'course_title': course_title,
-                    'completion_count': counts['completed'],
-                    'in_progress_count': counts['in_progress'],
-                    'not_started_count': counts['not_started'],
-                })
-                serializer = ProgressDataSerializer(progress_data, many=True)
+            serializer = ProgressDataSerializer(progress_data, many=True)
             return Response(serializer.data)
         except ObjectDoesNotExist as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @staticmethod
+    def count_progress(customer_id):
+        """
+        Progress counts per active course for the customer's actively enrolled users, None when
+        there are none. One grouped query through users.customer_id; the active enrollment check
+        is a correlated EXISTS, served by the course_enrollment (user_id, active) index.
+        """
+        has_active_enrollment = CourseEnrollment.objects.filter(user_id=OuterRef('enrolled_user_id'), active=True)
+        progress_data = list(
+            CourseCompletionStatusPerUser.objects.filter(
+                enrolled_user__customer_id=customer_id,
+                active=True,
+                deleted_at__isnull=True,
+                course__active=True,
+                course__deleted_at__isnull=True,
+            )
+            .filter(Exists(has_active_enrollment))
+            .values('course_id')
+            .annotate(
+                course_title=F('course__title'),
+                completion_count=Count('id', filter=Q(status=CourseCompletionStatusPerUser.COMPLETED)),
+                in_progress_count=Count('id', filter=Q(status=CourseCompletionStatusPerUser.IN_PROGRESS)),
+                not_started_count=Count('id', filter=Q(status=CourseCompletionStatusPerUser.NOT_STARTED)),
+            )
+            .values('course_title', 'completion_count', 'in_progress_count', 'not_started_count')
+            .order_by('course_id')
+        )
+        return progress_data or None
+
 #---------
\ No newline at end of file
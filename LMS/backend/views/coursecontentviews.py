@@ -11,6 +11,7 @@ from core.custom_mixins import (
     ClientAdminMixin,
     ClientMixin,
     SuperAdminMixin)
+from core.access_context import get_access_context
 from backend.serializers.editcourseserializers import (
     DeleteReadingMaterialSerializer,
     DeleteSelectedQuizSerializer,
@@ -430,7 +431,7 @@ class NotificationBasedOnCourseDisplayView(SuperAdminMixin,ClientAdminMixin,Clie
      def get(self, request, course_id, format=None):
         try:
             # user = request.user
-            user = request.data.get('user')
+            access_context = get_access_context(request)
             
             # Fetch notifications for the specified course
             notifications = Notification.objects.filter(course_id=course_id)
@@ -445,8 +446,9 @@ class NotificationBasedOnCourseDisplayView(SuperAdminMixin,ClientAdminMixin,Clie
 
             if self.has_client_admin_privileges(request):
                #  print('we are client')
-                course_enrollment = CourseEnrollment.objects.get(user=user['id'], course_id=course_id)
-                enrollment_date = course_enrollment.enrolled_at
+                enrollment_date = access_context.enrolled_courses.get(course_id)
+                if enrollment_date is None:
+                    raise CourseEnrollment.DoesNotExist
                 new_notifications = notifications.filter(created_at__gt=enrollment_date)
             
             serializer = NotificationSerializer(new_notifications, many=True)
@@ -3,7 +3,7 @@ from django.db import transaction
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from django.utils import timezone
 from django.db.models import Q
 from rest_framework import status
@@ -11,7 +11,11 @@ from django.db import transaction
 import pandas as pd
 
 from core.custom_permissions import SuperAdminOrGetOnly, SuperAdminPermission
-from backend.serializers.courseserializers import CourseDisplaySerializer
+from core.custom_pagination import StatisticsPagination
+from backend.serializers.courseserializers import (
+    CourseStatisticsDisplaySerializer,
+    CourseStatisticsOrderingSerializer,
+)
 from backend.serializers.deletecourseserializers import(
     EditCourseInstanceSerializer,
     DeleteSelectedCourseSerializer
@@ -47,10 +51,13 @@ from core.constants import filtered_display_list, manage_course_list
 class CourseView(APIView):
     """
     GET API for super admin to list of courses or single instance based on query parameters passed
+        the filtered_display listing includes registration, enrollment and progress counts per course,
+        accepts ordering=<field or count, '-' for descending> and page/page_size
     
     POST API for super admin to create new instances of course
     """
     permission_classes = [SuperAdminOrGetOnly]
+    query_budget = {'GET': 5}
 
     def get(self, request, *args, **kwargs):
         try:
@@ -73,7 +80,17 @@ class CourseView(APIView):
                 if filtered_display not in filtered_display_list : #["active", "inactive", "all"]
                     return Response({"error": "Invalid filtered_display parameter"}, status=status.HTTP_400_BAD_REQUEST)
                 
-                queryset = Course.objects.filter(deleted_at__isnull=True).order_by('-created_at')
+                ordering_serializer = CourseStatisticsOrderingSerializer(data=request.query_params)
+                ordering_serializer.is_valid(raise_exception=True)
+                ordering = ordering_serializer.validated_data.get('ordering', '-created_at')
+
+                # registration, enrollment and progress counts come from the same statement
+                queryset = (
+                    Course.objects.filter(deleted_at__isnull=True)
+                    .select_related('original_course')
+                    .with_statistics()
+                    .order_by(ordering, 'id')
+                )
                 
                 if filtered_display == "active":
                     queryset = queryset.filter(active=True)
@@ -83,9 +100,16 @@ class CourseView(APIView):
                 
                 if not course_list.exists():
                     return Response({"message": "No course found.", "data": []}, status=status.HTTP_404_NOT_FOUND)
-                serializer = CourseDisplaySerializer(course_list, many=True)
+                paginator = StatisticsPagination()
+                if paginator.is_requested(request):
+                    page = paginator.paginate_queryset(course_list, request, view=self)
+                    serializer = CourseStatisticsDisplaySerializer(page, many=True)
+                    return paginator.get_paginated_response(serializer.data)
+                serializer = CourseStatisticsDisplaySerializer(course_list, many=True)
                 return Response(serializer.data, status=status.HTTP_200_OK)
         except Exception as e:
+                if isinstance(e, NotFound):
+                    return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
                 if isinstance(e, ValidationError):
                     return Response({"error": "Validation Error: " + str(e)}, status=status.HTTP_400_BAD_REQUEST)
                 else:
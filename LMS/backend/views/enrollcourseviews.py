@@ -11,6 +11,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import generics
 from core.custom_permissions import ClientAdminPermission,IsClientOrAdmin
+from core.dashboard_cache import invalidate_dashboards_for_users
 from backend.models.coremodels import User
 from backend.models.allmodels import (
     Course,
@@ -115,6 +116,7 @@ class CourseEnrollmentView(APIView):
     PATCH - delete enrollment
     '''
     permission_classes = [ClientAdminPermission]
+    query_budget = {'GET': 4, 'POST': 8, 'PATCH': 4}
     
     def get(self, request, format=None):
         try:
@@ -296,5 +298,8 @@ class ManageCourseEnrollmentView(APIView):
         enrollments_to_update = enrollments.filter(active=False)
         if enrollments_to_update.exists():
             with transaction.atomic():
+                user_ids = list(enrollments_to_update.values_list('user_id', flat=True))
                 updated_count = enrollments_to_update.update(active=True)
+                # update() sends no signals
+                invalidate_dashboards_for_users(user_ids)
         return updated_count
\ No newline at end of file
@@ -0,0 +1,26 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views import View
+from core.metrics import registry
+
+
+class MetricsView(View):
+    """
+    GET API for the monitoring system: per-view latency, query and response size metrics
+    of all worker processes in Prometheus text format. Only served to the scraper, see
+    settings.METRICS_TOKEN and settings.METRICS_ALLOWED_IPS.
+    """
+    def get(self, request):
+        if not self.is_scraper(request):
+            return HttpResponseForbidden('Forbidden')
+        return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+    @staticmethod
+    def is_scraper(request):
+        if settings.METRICS_ALLOWED_IPS and request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+            return True
+        if settings.METRICS_TOKEN:
+            scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+            return scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+        return False
@@ -23,10 +23,10 @@ from backend.models.allmodels import (
     Choice,
     Course,
     CourseStructure,
-    Progress,
     Quiz,
     Question,
     QuizAttemptHistory,
+    QuizProgress,
 )
 from backend.serializers.createcourseserializers import (
     # CourseStructureSerializer,
@@ -351,7 +351,7 @@ class QuizTake(FormView):
     def get_form_kwargs(self):
         kwargs = super(QuizTake, self).get_form_kwargs()
 
-        return dict(kwargs, question=self.question)
+        return dict(kwargs, question=self.question, quiz=self.quiz)
 
     def form_valid(self, form):
         self.form_valid_user(form)
@@ -375,62 +375,34 @@ class QuizTake(FormView):
         return context
 
     def form_valid_user(self, form):
-        # =================================================================
-        # user = self.request.data.get('user')
-        user = {
-            "id": 11,
-            "first_name": "John",
-            "last_name": "Doe",
-            "role": 1,
-            "email": "john.doe@example.com",
-            "password": "password123",
-            "access_token": "abc123xyz",
-            "status": "active",
-            "created_by_id": 1,
-            "customer": 1,
-            "user_role_id": 2
-        }
-        user_id = user['id']
-        enrolled_user = get_object_or_404(User, pk=user_id)
-        # ===============================
-        # enrolled_user = request.user
-        # ===============================
-
-        progress, _ = Progress.objects.get_or_create(enrolled_user=enrolled_user)
         guess = form.cleaned_data["answers"]
-        is_correct = self.question.check_if_correct(guess)
+        is_correct = self.question.check_if_correct(guess, self.quiz)
 
-        if is_correct is True:
-            self.sitting.add_to_score(1)
-            progress.update_score(self.question, 1, 1)
-        else:
-            self.sitting.add_incorrect_question(self.question)
-            progress.update_score(self.question, 0, 1)
+        # the sitting's row is written once, with the progress, or not at all
+        with transaction.atomic():
+            if self.sitting.submit_answer(self.question, guess, is_correct):
+                QuizProgress.objects.add_score(self.sitting.enrolled_user_id, self.quiz.id, 1 if is_correct else 0, 1)
 
         if self.quiz.answers_at_end is not True:
             self.previous = {
                 "previous_answer": guess,
                 "previous_outcome": is_correct,
                 "previous_question": self.question,
-                "answers": self.question.get_choices(),
+                "answers": self.question.get_choices(self.quiz),
                 "question_type": {self.question.__class__.__name__: True},
             }
         else:
             self.previous = {}
 
-        self.sitting.add_user_answer(self.question, guess)
-        self.sitting.remove_first_question()
-
     def final_result_user(self):
         results = {
-            "course": get_object_or_404(Course, pk=self.kwargs["pk"]),
             "quiz": self.quiz,
             "score": self.sitting.get_current_score,
             "max_score": self.sitting.get_max_score,
             "percent": self.sitting.get_percent_correct,
             "sitting": self.sitting,
             "previous": self.previous,
-            "course": get_object_or_404(Course, pk=self.kwargs["pk"]),
+            "course": self.course,
         }
 
         self.sitting.mark_quiz_complete()
@@ -1,20 +1,24 @@
-from django.db import transaction
-from django.db.models import  Max
-from django.shortcuts import get_object_or_404
-from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from core.custom_permissions import ClientAdminPermission, SuperAdminOrPostOnly
-from backend.serializers.scoreserializers import CourseCompletionStatusSerializer
+from rest_framework.exceptions import ValidationError
+from core.access_context import get_access_context
+from core.custom_mixins import SuperAdminMixin
+from core.custom_permissions import ClientAdminPermission, SuperAdminOrPostOnly, SuperAdminPermission
+from backend.serializers.scoreserializers import CourseCompletionStatusResultSerializer, CourseCompletionStatusSerializer
 from backend.models.allmodels import (
     CourseCompletionStatusPerUser,
-    CourseStructure,
-    QuizAttemptHistory,
     QuizScore,
+    ScoreJob,
 )
-from backend.serializers.scoreserializers import QuizScoreSerializer
-from backend.models.allmodels import CourseEnrollment
+from backend.serializers.scoreserializers import QuizScoreSerializer, ScoreJobQuerySerializer, ScoreJobSerializer
+
+
+def enqueue_score_jobs(kind, course_ids, user_ids):
+    """Queue a `kind` ScoreJob for every course x user pair, 202 response listing the jobs."""
+    jobs = ScoreJob.objects.enqueue(kind, [(course_id, user_id) for course_id in course_ids for user_id in user_ids])
+    serializer = ScoreJobSerializer(jobs, many=True)
+    return Response({'message': 'jobs queued, poll score-jobs/?ids=... for their status', 'jobs': serializer.data}, status=status.HTTP_202_ACCEPTED)
 
 class CourseCompletionStatusView(APIView):
     """
@@ -31,6 +35,7 @@ class CourseCompletionStatusView(APIView):
         course = request body
         status = (default='not started')
         created_at = (auto_now_add=True)
+    pairs without an enrollment or with an existing record are counted as invalid / skipped
     """
     permission_classes = [ClientAdminPermission]
 
@@ -42,32 +47,10 @@ class CourseCompletionStatusView(APIView):
             if not course_ids or not user_ids:
                 return Response({'error': 'course_id and user_id lists are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-            course_completion_statuses = []
-            for course_id in course_ids:
-                for user_id in user_ids:
-                    # Check if the user is enrolled in the course
-                    if not CourseEnrollment.objects.filter(course_id=course_id, user_id=user_id).exists():
-                        return Response({'error': 'course enrollment not found'}, status=status.HTTP_404_NOT_FOUND)
-
-                    existing_entry = CourseCompletionStatusPerUser.objects.filter(course_id=course_id, enrolled_user_id=user_id).first()
-                    if existing_entry:
-                        return Response({'error': 'instance already exists'}, status=status.HTTP_200_OK)
-
-
-                    course_completion_status = CourseCompletionStatusPerUser(
-                        enrolled_user_id=user_id,
-                        course_id=course_id,
-                        created_at=timezone.now(),
-                        updated_at=timezone.now(),
-                        active=True,
-                        status="not_started"
-                    )
-                    course_completion_statuses.append(course_completion_status)
-
-            CourseCompletionStatusPerUser.objects.bulk_create(course_completion_statuses)
+            course_completion_statuses, counts = CourseCompletionStatusPerUser.objects.initialize(course_ids, user_ids)
 
             serializer = CourseCompletionStatusSerializer(course_completion_statuses, many=True)
-            return Response({'message': 'course completion status created successfully', 'completion_status': serializer.data}, status=status.HTTP_200_OK)
+            return Response({'message': 'course completion status created successfully', **counts, 'completion_status': serializer.data}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -89,6 +72,7 @@ class QuizScoreView(APIView):
         total_quizzes_per_course = calculate in view for course by counting active quizzes in it
         completed_quiz_count = by default 0
         total_score_per_course = (default=0)
+    pairs without an enrollment or with an existing record are counted as invalid / skipped
     """
     permission_classes = [ClientAdminPermission]
     
@@ -100,51 +84,21 @@ class QuizScoreView(APIView):
             if not course_ids or not user_ids:
                 return Response({'error': 'course_id and user_id lists are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-            quiz_scores = []
-            for course_id in course_ids:
-                total_quizzes_per_course = self.get_total_quizzes_per_course(course_id)
-
-                for user_id in user_ids:
-                    if not CourseEnrollment.objects.filter(course_id=course_id, user_id=user_id).exists():
-                         return Response({'error': 'course enrollment not found'}, status=status.HTTP_404_NOT_FOUND)
-
-                    existing_score = QuizScore.objects.filter(course_id=course_id, enrolled_user_id=user_id).first()
-
-                    if existing_score:
-                        return Response({'message': 'this quiz score already exists '}, status=status.HTTP_200_OK)
-
-                    quiz_score = QuizScore(
-                        enrolled_user_id=user_id,
-                        course_id=course_id,
-                        total_quizzes_per_course=total_quizzes_per_course,
-                        completed_quiz_count=0,
-                        total_score_per_course=0,
-                        created_at=timezone.now(),
-                        updated_at=timezone.now(),
-                        active=True
-                    )
-                    quiz_scores.append(quiz_score)
-
-            QuizScore.objects.bulk_create(quiz_scores)
+            quiz_scores, counts = QuizScore.objects.initialize(course_ids, user_ids)
 
             serializer = QuizScoreSerializer(quiz_scores, many=True)
-            return Response({'message': 'quiz score created successfully', 'quiz_score': serializer.data}, status=status.HTTP_200_OK)
+            return Response({'message': 'quiz score created successfully', **counts, 'quiz_score': serializer.data}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def get_total_quizzes_per_course(self, course_id):
-        try:
-            total_quizzes = CourseStructure.objects.filter(course_id=course_id, content_type='quiz', active=True, deleted_at__isnull=True).count()
-            return total_quizzes
-        except Exception as e:
-            return 0
-
 
 class QuizScorePerCourseView(APIView):
     """
     POST request
     triggered after quiz attempt history for a course, where user has completed = true.
     Update metrics including completed_quiz_count and total_score_per_course.
+    Every course in course_id is recomputed for every user in user_id, see QuizScoreManager.recompute.
+    With "async": true in the body the pairs are queued as ScoreJobs instead (202 response).
     """
     permission_classes = [SuperAdminOrPostOnly]
 
@@ -156,51 +110,13 @@ class QuizScorePerCourseView(APIView):
             if not (course_ids and user_ids):
                 return Response({'error': 'course_id and user_id lists are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-            for course_id in course_ids:
-                for user_id in user_ids:
-                    if not (course_id and user_id):
-                        return Response({'error': 'course_id and user_id are required'}, status=status.HTTP_400_BAD_REQUEST)
-
-                    # Count distinct completed quizzes for the user and course
-                    completed_quizzes_count = QuizAttemptHistory.objects.filter(course_id=course_id, enrolled_user_id=user_id, complete=True).values('quiz_id').distinct().count()
-
-                    # Calculate total score for the course
-                    last_attempted_quizzes = (
-                        QuizAttemptHistory.objects.filter(course_id=course_id, enrolled_user_id=user_id, complete=True)
-                        .values('quiz_id')
-                        .annotate(last_attempt=Max('created_at'))
-                        .order_by('-last_attempt')
-                    )
-
-                    unique_quizzes = QuizAttemptHistory.objects.filter(
-                        course_id=course_id,
-                        enrolled_user_id=user_id,
-                        complete=True,
-                        created_at__in=[quiz['last_attempt'] for quiz in last_attempted_quizzes]
-                    )
-
-                    total_score = 0
-                    for quiz_attempt in unique_quizzes:
-                        total_score += (quiz_attempt.current_score / (len(quiz_attempt.question_list_order.split(','))-1))
-
-                    total_quizzes = CourseStructure.objects.filter(course_id=course_id, content_type='quiz', active=True).count()
-
-                    if total_quizzes > 0:
-                        average_score = (total_score / total_quizzes) * 100.0
-                    else:
-                        average_score = 0
+            if not all(course_ids) or not all(user_ids):
+                return Response({'error': 'course_id and user_id are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-                    # Update or create QuizScore object
-                    quiz_score, created = QuizScore.objects.get_or_create(
-                        course_id=course_id,
-                        enrolled_user_id=user_id,
-                        defaults={'completed_quiz_count': 0, 'total_score_per_course': 0}
-                    )
+            if request.data.get('async'):
+                return enqueue_score_jobs(ScoreJob.QUIZ_SCORE, course_ids, user_ids)
 
-                    quiz_score.completed_quiz_count = completed_quizzes_count
-                    quiz_score.total_score_per_course = average_score
-                    quiz_score.total_quizzes_per_course=total_quizzes
-                    quiz_score.save()
+            QuizScore.objects.recompute(course_ids=course_ids, user_ids=user_ids)
 
             # Serialize the QuizScore objects
             quiz_scores = QuizScore.objects.filter(course_id__in=course_ids, enrolled_user_id__in=user_ids)
@@ -219,10 +135,14 @@ class CourseCompletionStatusPerUserView(APIView):
         completion_status=True and in_progress_status =False
     if total_quizzes_per_course > completed_quiz_count:
         completion_status=False and in_progress_status =True
+    Every course in course_id is processed for every user in user_id: the quiz scores are read
+    in one query and the statuses written in bulk (CourseCompletionStatusManager.set_statuses).
+    Responds with one result per pair; pairs without a quiz score are reported and skipped.
+    With "async": true in the body the pairs are queued as ScoreJobs instead (202 response).
     """
     permission_classes = [SuperAdminOrPostOnly]
+    query_budget = 24
 
-    @transaction.atomic
     def post(self, request):
         try:
             course_ids = request.data.get('course_id', [])
@@ -231,30 +151,54 @@ class CourseCompletionStatusPerUserView(APIView):
             if not (course_ids and user_ids):
                 return Response({'error': 'course_id and user_id are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-            for course_id in course_ids:
-                for user_id in user_ids:
+            if request.data.get('async'):
+                return enqueue_score_jobs(ScoreJob.COMPLETION_STATUS, course_ids, user_ids)
 
-                    course_completion_status, created = CourseCompletionStatusPerUser.objects.get_or_create(
-                        course_id=course_id, enrolled_user_id=user_id
-                    )
+            statuses, results = CourseCompletionStatusPerUser.objects.update_from_scores(
+                {(course_id, user_id) for course_id in course_ids for user_id in user_ids}
+            )
+            if not statuses:
+                return Response({'error': 'Quiz score record not found'}, status=status.HTTP_404_NOT_FOUND)
 
-                    quiz_score = get_object_or_404(QuizScore, course_id=course_id, enrolled_user_id=user_id)
+            serializer = CourseCompletionStatusResultSerializer(
+                [
+                    {
+                        'course_id': course_id,
+                        'user_id': user_id,
+                        'status': statuses.get((course_id, user_id)),
+                        'result': results.get((course_id, user_id), 'quiz_score_not_found'),
+                    }
+                    for course_id in course_ids
+                    for user_id in user_ids
+                ],
+                many=True
+            )
+            return Response({'message': 'Course completion status updated successfully', 'course_completion_status': serializer.data}, status=status.HTTP_200_OK)
 
-                    if quiz_score.total_quizzes_per_course == quiz_score.completed_quiz_count:
-                        course_completion_status.status = "completed"
-                        
-                    elif quiz_score.total_quizzes_per_course > quiz_score.completed_quiz_count:
-                        course_completion_status.status = "in_progress"
-                    else:
-                        course_completion_status.status = "not_started"
+        except Exception as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-                    course_completion_status.save()
 
-                    # Serialize the updated course completion status
-                    serializer = CourseCompletionStatusSerializer(course_completion_status)
-                    return Response({'message': 'Course completion status updated successfully', 'course_completion_status': serializer.data}, status=status.HTTP_200_OK)
-        
+class ScoreJobView(SuperAdminMixin, APIView):
+    """
+    GET request
+    status of queued score jobs, query param ids=<comma separated job ids>
+    jobs that no longer exist (purged) are left out, and so are, for a client admin,
+    the jobs of users of other customers
+    """
+    permission_classes = [SuperAdminPermission | ClientAdminPermission]
+    query_budget = 3
+
+    def get(self, request):
+        try:
+            query_serializer = ScoreJobQuerySerializer(data=request.query_params)
+            query_serializer.is_valid(raise_exception=True)
+            jobs = ScoreJob.objects.filter(id__in=query_serializer.validated_data['ids']).order_by('id')
+            if not self.has_super_admin_privileges(request):
+                jobs = jobs.filter(user__customer_id=get_access_context(request).customer_id)
+            serializer = ScoreJobSerializer(jobs, many=True)
+            return Response(serializer.data, status=status.HTTP_200_OK)
+        except ValidationError as e:
+            return Response({'error': e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            if isinstance(e, QuizScore.DoesNotExist):
-                return Response({'error': 'Quiz score record not found'}, status=status.HTTP_404_NOT_FOUND)
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
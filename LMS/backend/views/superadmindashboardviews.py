@@ -1,20 +1,212 @@
 # from core.custom_permissions import SuperAdminPermission
+import datetime
+from contextlib import contextmanager
 from core.custom_permissions import SuperAdminPermission
+from core.custom_pagination import StatisticsPagination
+from core.dashboard_cache import dashboard_cache
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from backend.serializers.courseserializers import CourseStatisticsOrderingSerializer
 from backend.serializers.superadmindashboardserializers import (
-    ActiveCourseCountSerializer, 
-    ActiveRegistrationCountSerializer, 
-    InActiveCourseCountSerializer
+    ActiveCourseCountSerializer,
+    ActiveRegistrationCountSerializer,
+    DashboardBundleSerializer,
+    InActiveCourseCountSerializer,
+    ProgressPerCourseFilterSerializer,
+    ProgressTrendSerializer,
 )
 from backend.models.allmodels import (
     Course,
     CourseCompletionStatusPerUser,
+    CourseProgressSnapshot,
+    CourseQuerySet,
     CourseRegisterRecord,
 )
 from rest_framework.exceptions import NotFound, ValidationError
 
+# =================================================================
+# super admin dashboard widgets
+# shared by the single widget views and the bundle view
+# =================================================================
+def get_active_courses():
+    return Course.objects.filter(active=True, deleted_at__isnull=True)
+
+
+def count_active_registered_customers():
+    return CourseRegisterRecord.objects.filter(active=True, deleted_at__isnull=True).values('customer').distinct().count()
+
+
+def active_registrations_per_course(courses=None, ordering=None):
+    """
+    Unevaluated queryset of active courses with their count of active registrations, so it
+    can be sliced into a page before it runs.
+    """
+    courses = get_active_courses() if courses is None else courses
+    # annotated first so they lead each row, as they always have
+    courses = courses.annotate(course_id=F('id'), course_title=F('title'))
+    statistics = {'active_registration_count'}
+    if ordering and ordering.lstrip('-') in CourseQuerySet.STATISTICS:
+        statistics.add(ordering.lstrip('-'))
+    courses = courses.with_statistics(*sorted(statistics))
+    courses = courses.order_by(ordering, 'id') if ordering else courses.order_by('id')
+    return courses.values('course_id', 'course_title', 'active_registration_count')
+
+
+def count_active_registrations_per_course(courses=None, ordering=None):
+    """
+    Active courses with their count of active registrations, one query.
+    """
+    return list(active_registrations_per_course(courses, ordering=ordering))
+
+
+def count_progress_per_course(filters, courses=None):
+    """
+    Active courses with their completed / in progress / not started counts, one query.
+    Without a date range the counts come from the maintained CourseProgressRollup table,
+    a date range needs the status records themselves.
+    """
+    courses = get_active_courses() if courses is None else courses
+    courses = courses.annotate(course_id=F('id'), course_title=F('title'))
+    if not (filters.get('start_date') or filters.get('end_date')):
+        courses = courses.with_statistics(
+            'completion_count', 'in_progress_count', 'not_started_count', customer_id=filters.get('customer_id')
+        ).annotate(
+            course_in_progress_count=F('in_progress_count'),
+            course_not_started_count=F('not_started_count'),
+        )
+    else:
+        status_filter = Q(coursecompletionstatusperuser__active=True)
+        if filters.get('start_date'):
+            status_filter &= Q(coursecompletionstatusperuser__created_at__date__gte=filters['start_date'])
+        if filters.get('end_date'):
+            status_filter &= Q(coursecompletionstatusperuser__created_at__date__lte=filters['end_date'])
+        if filters.get('customer_id'):
+            status_filter &= Q(coursecompletionstatusperuser__enrolled_user__customer_id=filters['customer_id'])
+
+        def count_status(status_value):
+            return Count(
+                'coursecompletionstatusperuser',
+                filter=status_filter & Q(coursecompletionstatusperuser__status=status_value)
+            )
+
+        courses = courses.annotate(
+            completion_count=count_status(CourseCompletionStatusPerUser.COMPLETED),
+            course_in_progress_count=count_status(CourseCompletionStatusPerUser.IN_PROGRESS),
+            course_not_started_count=count_status(CourseCompletionStatusPerUser.NOT_STARTED),
+        )
+
+    return list(
+        courses.values(
+            'course_id',
+            'course_title',
+            'completion_count',
+            'course_in_progress_count',
+            'course_not_started_count',
+        )
+    )
+
+
+def count_courses():
+    """
+    (active course count, inactive course count)
+    """
+    return (
+        get_active_courses().count(),
+        Course.objects.filter(active=False, deleted_at__isnull=True).count(),
+    )
+
+
+def get_course_count_data(active_course_count, inactive_course_count):
+    if active_course_count == 0:
+        active_response = {"message": "No active courses were found"}
+    else:
+        active_serializer = ActiveCourseCountSerializer({'active_course_count': active_course_count})
+        active_response = active_serializer.data
+    if inactive_course_count == 0:
+        inactive_response = {"message": "No inactive courses were found"}
+    else:
+        inactive_serializer = InActiveCourseCountSerializer({'inactive_course_count': inactive_course_count})
+        inactive_response = inactive_serializer.data
+    return {
+        "active_courses": active_response,
+        "inactive_courses": inactive_response
+    }
+
+
+def get_bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def get_progress_trend(filters):
+    """
+    Progress counts over time from the daily CourseProgressSnapshot rows, one query.
+    Per bucket the status counts are those of its last snapshot day, attempts are summed and
+    avg_score, a percentage, is the attempt weighted average of the daily average percentages.
+    """
+    snapshots = CourseProgressSnapshot.objects.filter(date__range=(filters['start_date'], filters['end_date']))
+    if filters.get('course_id'):
+        snapshots = snapshots.filter(course_id=filters['course_id'])
+    if filters.get('customer_id'):
+        snapshots = snapshots.filter(customer_id=filters['customer_id'])
+    days = (
+        snapshots.values('date')
+        .annotate(
+            completed=Sum('completed'),
+            in_progress=Sum('in_progress'),
+            not_started=Sum('not_started'),
+            attempt_count=Sum('attempts'),
+            score_total=Sum(
+                ExpressionWrapper(F('avg_score') * F('attempts'), output_field=DecimalField(max_digits=20, decimal_places=2))
+            ),
+        )
+        .order_by('date')
+    )
+
+    buckets = {}
+    for day in days:
+        bucket = buckets.setdefault(
+            get_bucket_start(day['date'], filters['bucket']), {'attempts': 0, 'score_total': 0}
+        )
+        # days come in order, so the last one written is the bucket's closing level
+        bucket['completed'] = day['completed']
+        bucket['in_progress'] = day['in_progress']
+        bucket['not_started'] = day['not_started']
+        bucket['attempts'] += day['attempt_count']
+        bucket['score_total'] += day['score_total'] or 0
+
+    return [
+        {
+            'bucket': bucket_start,
+            'completed': bucket['completed'],
+            'in_progress': bucket['in_progress'],
+            'not_started': bucket['not_started'],
+            'attempts': bucket['attempts'],
+            'avg_score': round(bucket['score_total'] / bucket['attempts'], 2) if bucket['attempts'] else None,
+        }
+        for bucket_start, bucket in buckets.items()
+    ]
+
+
+@contextmanager
+def read_only_snapshot():
+    """
+    Runs the block in one transaction; on PostgreSQL it is REPEATABLE READ, READ ONLY, so
+    every query in it reads the same snapshot of the database.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+        yield
+
+
 # =================================================================
 # super admin dashboard
 # =================================================================
@@ -23,9 +215,12 @@ class ActiveRegisteredCustomerCountView(APIView):
     GET API for super admin to get count active and inactive registrations.
     """
     permission_classes = [SuperAdminPermission]
+    query_budget = 3
     def get(self, request):
         try:
-            active_registration_count = CourseRegisterRecord.objects.filter(active=True, deleted_at__isnull=True).values('customer').distinct().count()
+            active_registration_count = dashboard_cache.get_or_compute(
+                'active_registered_customer_count', count_active_registered_customers
+            )
             if active_registration_count is None:
                 return Response({"message": "no active registration were found"}, status=status.HTTP_404_NOT_FOUND)
             serializer = ActiveRegistrationCountSerializer({'active_registered_customer_count': active_registration_count})
@@ -37,7 +232,7 @@ class ActiveRegisteredCustomerCountView(APIView):
                 return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-# graph to count registrations per course 
+# graph to count registrations per course
 class CountOfActiveRegistrationPerCoure(APIView):
     """
     GET API for super admin to get count active registrations of customers per each courses separately.
@@ -46,32 +241,47 @@ class CountOfActiveRegistrationPerCoure(APIView):
         get list of active courses from course table
         and for each course count instances from course registration records which are active =true, deleted_at =null
         and pass this data in response for each course send it's calculated count
+        optional query params: ordering=<count, title or created_at, '-' for descending>, page, page_size
     """
     permission_classes = [SuperAdminPermission]
-    
+    query_budget = 3
+
     def get(self, request):
         try:
-            active_courses = Course.objects.filter(active=True, deleted_at__isnull=True)
-            if not active_courses:
-                return Response({"message": "no active course found"},status=status.HTTP_404_NOT_FOUND)
+            ordering_serializer = CourseStatisticsOrderingSerializer(data=request.query_params)
+            ordering_serializer.is_valid(raise_exception=True)
+            ordering = ordering_serializer.validated_data.get('ordering')
+
+            paginator = StatisticsPagination()
+            if paginator.is_requested(request):
+                # the page is sliced in SQL: a COUNT and a LIMIT query, whatever the number of courses
+                paginated_counts = dashboard_cache.get_or_compute(
+                    'active_registration_per_course_page',
+                    lambda: paginator.get_paginated_response(paginator.paginate_queryset(
+                        active_registrations_per_course(ordering=ordering), request, view=self
+                    )).data,
+                    params={
+                        'ordering': ordering,
+                        'page': request.query_params.get(paginator.page_query_param),
+                        'page_size': paginator.get_page_size(request),
+                    }
+                )
+                if not paginated_counts['count']:
+                    return Response({"message": "no active course found"},status=status.HTTP_404_NOT_FOUND)
+                return Response(paginated_counts, status=status.HTTP_200_OK)
 
-            course_active_registration_counts = []
-            
-            for course in active_courses:
-                active_registration_count = CourseRegisterRecord.objects.filter(
-                    course=course,
-                    active=True,
-                    deleted_at__isnull=True
-                ).count()
-                if active_registration_count is None:
-                    return Response({"error": "Course Registration not found"}, status=status.HTTP_404_NOT_FOUND)
-                course_active_registration_counts.append({
-                    'course_id': course.id,
-                    'course_title': course.title,
-                    'active_registration_count': active_registration_count
-                })
-                
+            course_active_registration_counts = dashboard_cache.get_or_compute(
+                'active_registration_per_course',
+                lambda: count_active_registrations_per_course(ordering=ordering),
+                params={'ordering': ordering}
+            )
+            if not course_active_registration_counts:
+                return Response({"message": "no active course found"},status=status.HTTP_404_NOT_FOUND)
             return Response(course_active_registration_counts, status=status.HTTP_200_OK)
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except NotFound as e:
+            return Response({"error": str(e)}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -79,45 +289,31 @@ class CountOfActiveRegistrationPerCoure(APIView):
 class GraphOfProgressPerCourseView(APIView):
     """
     GET API for super admin to get count of completed, in progress and not-tarted status of courses separately.
+
+    Optional query params:
+        start_date, end_date - only count status records created in this range (inclusive)
+        customer_id - only count users of this customer
+    Without a date range the counts come from the maintained CourseProgressRollup table.
     """
     permission_classes = [SuperAdminPermission]
-    
+    query_budget = 3
+
     def get(self, request):
         try:
-            active_courses = Course.objects.filter(active=True, deleted_at__isnull=True)
-            if not active_courses:
-                return Response({"message": "no active course found"},status=status.HTTP_404_NOT_FOUND)
+            filter_serializer = ProgressPerCourseFilterSerializer(data=request.query_params)
+            filter_serializer.is_valid(raise_exception=True)
+            filters = filter_serializer.validated_data
 
-            course_progress_counts = []
-            for course in active_courses:
-                completion_count = CourseCompletionStatusPerUser.objects.filter(
-                    course=course,
-                    active=True,
-                    status='COMPLETED'
-                ).count()
-                in_progress_count = CourseCompletionStatusPerUser.objects.filter(
-                    course=course,
-                    active=True,
-                    status='IN_PROGRESS'
-                ).count()
-                not_started_count = CourseCompletionStatusPerUser.objects.filter(
-                    course=course,
-                    active=True,
-                    status='NOT_STARTED'
-                ).count()
-                course_progress_counts.append({
-                    'course_id': course.id,
-                    'course_title': course.title,
-                    'completion_count': completion_count,
-                    'course_in_progress_count': in_progress_count,
-                    'course_not_started_count': not_started_count
-                })
+            course_progress_counts = dashboard_cache.get_or_compute(
+                'progress_per_course', lambda: count_progress_per_course(filters), params=filters
+            )
+            if not course_progress_counts:
+                return Response({"message": "no active course found"},status=status.HTTP_404_NOT_FOUND)
             return Response(course_progress_counts, status=status.HTTP_200_OK)
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            if isinstance(e, (CourseCompletionStatusPerUser.DoesNotExist)):
-                return Response({"error": "Course Completion Status not found"}, status=status.HTTP_404_NOT_FOUND)
-            else:
-                return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
 class CourseCountView(APIView):
@@ -125,27 +321,14 @@ class CourseCountView(APIView):
     GET API for super admin to get count of active and inactive courses separately.
     """
     permission_classes = [SuperAdminPermission]
-    
+    query_budget = 4
+
     def get(self, request):
         try:
-            active_course_count = Course.objects.filter(active=True, deleted_at__isnull=True).count()
-            inactive_course_count = Course.objects.filter(active=False, deleted_at__isnull=True).count()
-            
-            if active_course_count == 0:
-                active_response = {"message": "No active courses were found"}
-            else:
-                active_serializer = ActiveCourseCountSerializer({'active_course_count': active_course_count})
-                active_response = active_serializer.data
-            if inactive_course_count == 0:
-                inactive_response = {"message": "No inactive courses were found"}
-            else:
-                inactive_serializer = InActiveCourseCountSerializer({'inactive_course_count': inactive_course_count})
-                inactive_response = inactive_serializer.data
-
-            return Response({
-                "active_courses": active_response,
-                "inactive_courses": inactive_response
-            }, status=status.HTTP_200_OK)
+            active_course_count, inactive_course_count = dashboard_cache.get_or_compute('course_count', count_courses)
+            return Response(
+                get_course_count_data(active_course_count, inactive_course_count), status=status.HTTP_200_OK
+            )
         except Exception as e:
             if isinstance(e, (ValidationError, Course.DoesNotExist)):
                 if isinstance(e, ValidationError):
@@ -154,3 +337,89 @@ class CourseCountView(APIView):
                     return Response({"error": "Course not found"}, status=status.HTTP_404_NOT_FOUND)
             else:
                 return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class SuperAdminDashboardBundleView(APIView):
+    """
+    GET API for super admin to get several dashboard widgets in one response.
+
+    Query params:
+        widgets - comma separated subset of registration_count, registrations_per_course,
+                  progress_per_course, course_count (default: all of them)
+        start_date, end_date, customer_id - filters of progress_per_course
+    Each widget holds the same data as its own endpoint. All of them are read in one
+    read-only, repeatable-read transaction, so they agree with each other.
+    """
+    permission_classes = [SuperAdminPermission]
+    query_budget = 6
+
+    def get(self, request):
+        try:
+            serializer = DashboardBundleSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            widgets = serializer.validated_data['widgets']
+            filters = {
+                key: value for key, value in serializer.validated_data.items() if key != 'widgets'
+            }
+            data = dashboard_cache.get_or_compute(
+                'bundle',
+                lambda: self.compute_widgets(widgets, filters),
+                params={'widgets': ','.join(widgets), **filters}
+            )
+            return Response(data, status=status.HTTP_200_OK)
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @staticmethod
+    def compute_widgets(widgets, filters):
+        data = {}
+        with read_only_snapshot():
+            courses = get_active_courses()
+            if 'registration_count' in widgets:
+                data['registration_count'] = {
+                    'active_registered_customer_count': count_active_registered_customers()
+                }
+            if 'registrations_per_course' in widgets:
+                data['registrations_per_course'] = count_active_registrations_per_course(courses)
+            if 'progress_per_course' in widgets:
+                data['progress_per_course'] = count_progress_per_course(filters, courses)
+            if 'course_count' in widgets:
+                per_course = data.get('registrations_per_course', data.get('progress_per_course'))
+                if per_course is None:
+                    active_course_count, inactive_course_count = count_courses()
+                else:
+                    # the per course widgets already list every active course
+                    active_course_count = len(per_course)
+                    inactive_course_count = Course.objects.filter(active=False, deleted_at__isnull=True).count()
+                data['course_count'] = get_course_count_data(active_course_count, inactive_course_count)
+        return data
+
+
+class ProgressTrendView(APIView):
+    """
+    GET API for super admin to get completed, in progress and not started counts over time,
+    with the quiz attempts and average score of each period.
+
+    Optional query params:
+        start_date, end_date - inclusive range (default: the last 30 days)
+        bucket - day, week or month (default: day)
+        course_id, customer_id - narrow the counts to one course / customer
+    Reads the daily rows written by `manage.py snapshot_progress`; days without a snapshot
+    are left out.
+    """
+    permission_classes = [SuperAdminPermission]
+    query_budget = 3
+
+    def get(self, request):
+        try:
+            serializer = ProgressTrendSerializer(data=request.query_params)
+            serializer.is_valid(raise_exception=True)
+            filters = serializer.validated_data
+            trend = dashboard_cache.get_or_compute('progress_trend', lambda: get_progress_trend(filters), params=filters)
+            return Response(trend, status=status.HTTP_200_OK)
+        except ValidationError as e:
+            return Response({"error": e.detail}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -46,6 +46,8 @@ from django.utils import timezone
 class UploadVideoToS3APIView(APIView):
 
     permission_classes = [CourseContentPermissions]
+    # uploads and transcoding legitimately run longer than settings.REQUEST_TIMEOUT
+    request_timeout = 300
     
     def post(self, request, course_id, *args, **kwargs):
         try:
@@ -0,0 +1,107 @@
+from django.db.models import CharField, Value
+from django.utils.functional import cached_property
+from backend.models.allmodels import CourseEnrollment, CourseRegisterRecord
+from core.privilege_resolver import privilege_resolver
+
+
+class AccessContext:
+    """
+    Identity and access facts about the caller of a single request.
+
+    Built once per request (by the authenticator, or lazily on first use) and shared by
+    permission classes and views:
+        resource_ids        - resource ids the caller's role has privileges on
+        enrolled_courses    - {course_id: enrolled_at} for the caller's active enrollments
+        registered_courses  - {course_id: created_at} for the customer's active registrations
+    Privileges come from the privilege resolver cache, both course maps from one UNION query.
+    """
+    ENROLLED = 'enrolled'
+    REGISTERED = 'registered'
+
+    def __init__(self, user_id=None, role_id=None, customer_id=None):
+        self.user_id = user_id
+        self.role_id = role_id
+        self.customer_id = customer_id
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user_id=user.id, role_id=user.role, customer_id=user.customer_id)
+
+    @classmethod
+    def from_user_data(cls, user_data):
+        if not isinstance(user_data, dict):
+            user_data = {}
+        return cls(
+            user_id=user_data.get('id'),
+            role_id=user_data.get('role'),
+            customer_id=user_data.get('customer'),
+        )
+
+    @cached_property
+    def resource_ids(self):
+        return privilege_resolver.get_resource_ids(self.role_id)
+
+    @cached_property
+    def _course_maps(self):
+        enrolled_courses, registered_courses = {}, {}
+        querysets = []
+        if self.user_id is not None:
+            querysets.append(
+                CourseEnrollment.objects.filter(user=self.user_id, active=True)
+                .annotate(kind=Value(self.ENROLLED, output_field=CharField()))
+                .values_list('course_id', 'enrolled_at', 'kind')
+            )
+        if self.customer_id is not None:
+            querysets.append(
+                CourseRegisterRecord.objects.filter(customer=self.customer_id, active=True)
+                .annotate(kind=Value(self.REGISTERED, output_field=CharField()))
+                .values_list('course_id', 'created_at', 'kind')
+            )
+        if not querysets:
+            return enrolled_courses, registered_courses
+
+        rows = querysets[0].union(*querysets[1:], all=True) if len(querysets) > 1 else querysets[0]
+        for course_id, since, kind in rows:
+            target = enrolled_courses if kind == self.ENROLLED else registered_courses
+            target.setdefault(course_id, since)
+        return enrolled_courses, registered_courses
+
+    @property
+    def enrolled_courses(self):
+        return self._course_maps[0]
+
+    @property
+    def registered_courses(self):
+        return self._course_maps[1]
+
+    def is_enrolled(self, course_id):
+        return _as_int(course_id) in self.enrolled_courses
+
+    def is_registered(self, course_id):
+        return _as_int(course_id) in self.registered_courses
+
+
+def _as_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def attach_access_context(request, access_context):
+    http_request = getattr(request, '_request', request)
+    http_request.access_context = access_context
+    return access_context
+
+
+def get_access_context(request):
+    """
+    Return the AccessContext of the request, building it from request.data['user']
+    the first time it is asked for if the authenticator did not attach one.
+    """
+    http_request = getattr(request, '_request', request)
+    access_context = getattr(http_request, 'access_context', None)
+    if access_context is None:
+        data = getattr(request, 'data', None) or {}
+        access_context = attach_access_context(request, AccessContext.from_user_data(data.get('user')))
+    return access_context
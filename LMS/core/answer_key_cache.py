@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.db.models import FilteredRelation, Q
+from core.ttl_cache import TTLCache
+
+
+class AnswerKey:
+    """
+    Answer key of one version of a quiz: for each question, its correct choice ids, its
+    choices as (id, text, correct) and its choice order policy.
+    """
+
+    def __init__(self, questions):
+        self.questions = questions
+        self.choice_texts = {
+            choice_id: text
+            for _, choices, _ in questions.values()
+            for choice_id, text, _ in choices
+        }
+
+    def is_correct(self, question_id, guess):
+        question = self.questions.get(question_id)
+        return question is not None and int(guess) in question[0]
+
+    def choice_text(self, guess):
+        return self.choice_texts[int(guess)]
+
+    def get_choices(self, question_id):
+        """The question's choices as unsaved Choice instances, ordered as Question.order_choices would."""
+        from backend.models.allmodels import Choice, Question
+        _, choices, choice_order = self.questions.get(question_id, (frozenset(), (), None))
+        return Question.sort_choices(
+            [Choice(id=choice_id, question_id=question_id, choice=text, correct=correct) for choice_id, text, correct in choices],
+            choice_order,
+        )
+
+
+class AnswerKeyCache:
+    """
+    Per quiz answer keys, loaded in one query and cached in process under
+    (quiz id, Quiz.content_version). Saving or deleting a Question or Choice increments the
+    version of its quizzes (see the receivers in backend/models/allmodels.py), so a key is
+    never served for content it was not built from, in any worker. Older versions just age
+    out of the LRU.
+    """
+
+    def __init__(self, ttl=None, maxsize=None):
+        if ttl is None:
+            ttl = getattr(settings, 'QUIZ_ANSWER_KEY_CACHE_TTL', 3600)
+        if maxsize is None:
+            maxsize = getattr(settings, 'QUIZ_ANSWER_KEY_CACHE_SIZE', 500)
+        self._cache = TTLCache(ttl=ttl, maxsize=maxsize)
+
+    def get(self, quiz):
+        key = (quiz.id, quiz.content_version)
+        answer_key = self._cache.get(key)
+        if answer_key is None:
+            answer_key = self.load(quiz.id)
+            self._cache.set(key, answer_key)
+        return answer_key
+
+    @staticmethod
+    def load(quiz_id):
+        from backend.models.allmodels import Question
+        # only active choices are joined, a question whose choices are all inactive still gets a row
+        rows = (
+            Question.objects.filter(quizzes__id=quiz_id)
+            .annotate(active_choice=FilteredRelation('choice', condition=Q(choice__active=True)))
+            .values_list('id', 'choice_order', 'active_choice__id', 'active_choice__choice', 'active_choice__correct')
+            .order_by('id', 'active_choice__id')
+        )
+        questions = {}
+        for question_id, choice_order, choice_id, text, correct in rows:
+            correct_ids, choices, _ = questions.setdefault(question_id, (set(), [], choice_order))
+            if choice_id is None:
+                # a question without active choices
+                continue
+            choices.append((choice_id, text, correct))
+            if correct:
+                correct_ids.add(choice_id)
+        return AnswerKey({
+            question_id: (frozenset(correct_ids), tuple(choices), choice_order)
+            for question_id, (correct_ids, choices, choice_order) in questions.items()
+        })
+
+    def clear(self):
+        self._cache.clear()
+
+
+answer_key_cache = AnswerKeyCache()
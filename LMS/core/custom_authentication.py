@@ -1,16 +1,29 @@
-import requests
+import hashlib
+import jwt
+from django.conf import settings
 from rest_framework import exceptions
 from rest_framework.authentication import BaseAuthentication
 from backend.models.coremodels import User
+from core.access_context import AccessContext, attach_access_context
+from core.identity_client import identity_client
+from core.jwt_keys import JWTKeySet
+from core.ttl_cache import TTLCache
+
+MICROSERVICE1_API_URL2 = settings.IDENTITY_SERVICE_URL
+
+# token hash -> User, and token hash -> True for tokens the identity service rejected
+token_cache = TTLCache(ttl=settings.AUTH_TOKEN_CACHE_TTL, maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+invalid_token_cache = TTLCache(ttl=settings.AUTH_INVALID_TOKEN_CACHE_TTL, maxsize=settings.AUTH_TOKEN_CACHE_SIZE)
+
+
+def hash_token(access_token):
+    return hashlib.sha256(access_token.encode()).hexdigest()
 
-MICROSERVICE1_API_URL2 = "http://microservice1/api/get_user/"
 
 class BasicAuthentication(BaseAuthentication):
     def authenticate(self, request):
-        access_token = None
         try:
             auth = self.get_authorization_header(request).split()
-            access_token = auth[1]
         except Exception as e:
             return None
 
@@ -26,15 +39,30 @@ class BasicAuthentication(BaseAuthentication):
         if len(auth) > 2:
             raise exceptions.AuthenticationFailed(
                 "Invalid basic header. Credential string is not properly formatted")
-        try:
-            username = self.get_username_from_access_token(access_token) # api from node will be used here
-        except Exception as e:
-            username = None
 
-        return self.authenticate_credentials(username, request)
+        return self.authenticate_token(auth[1], request)
+
+    def authenticate_token(self, access_token, request=None):
+        # tokens are only kept hashed so the caches never hold usable credentials
+        token_key = hash_token(access_token)
+        user = token_cache.get(token_key)
+        if user is None:
+            if invalid_token_cache.get(token_key):
+                raise exceptions.AuthenticationFailed("Invalid Token")
+            username = self.get_username_from_access_token(access_token) # api from node will be used here
+            try:
+                user, _ = self.authenticate_credentials(username)
+            except exceptions.AuthenticationFailed:
+                invalid_token_cache.set(token_key, True)
+                raise
+            token_cache.set(token_key, user)
+
+        if request is not None:
+            attach_access_context(request, AccessContext.from_user(user))
+        return user, None
 
     def authenticate_credentials(self, username, request=None):
-        user = User.objects.filter(email=username).first()
+        user = User.objects.filter(email=username).first() if username else None
         if user is None:
             raise exceptions.AuthenticationFailed(
                 "Invalid Token")
@@ -42,26 +70,84 @@ class BasicAuthentication(BaseAuthentication):
         if not user.is_active:
             raise exceptions.AuthenticationFailed("User is inactive")
 
+        if request is not None:
+            attach_access_context(request, AccessContext.from_user(user))
         return user, None
 
-    def get_authorization_header(request):
+    def get_authorization_header(self, request):
         auth = request.headers.get('Authorization')
         return auth
     
-    def get_username_from_access_token(access_token):
-        pass
-        # try:
-        #     headers = {"Authorization": f"Bearer {access_token}"}
-        #     response = requests.get(MICROSERVICE1_API_URL2, headers=headers)
-        #     if response.status_code == 200:
-        #         user_data = response.json()
-        #         username = user_data.get("username")
-        #         return username
-        #     else:
-        #         return None
-        # except requests.RequestException as e:
-        #     # Handle request exceptions
-        #     return None
+    def get_username_from_access_token(self, access_token):
+        return identity_client.get_username(access_token)
+
+
+class JWTAuthentication(BasicAuthentication):
+    """
+    Bearer authentication that verifies signed access tokens locally and builds the user
+    from their claims (JWT_USER_ID_CLAIM, JWT_ROLE_CLAIM, JWT_CUSTOMER_CLAIM) without a
+    remote call or a users query. Opaque tokens fall back to the identity-service lookup
+    of BasicAuthentication. Enable by listing it in REST_FRAMEWORK's
+    DEFAULT_AUTHENTICATION_CLASSES in place of BasicAuthentication.
+    """
+    key_set = None
+
+    def authenticate_token(self, access_token, request=None):
+        key_set = self.get_key_set()
+        if not key_set.is_configured or not self.is_jwt(access_token):
+            return super().authenticate_token(access_token, request)
+
+        user = self.get_user_from_claims(self.verify(access_token, key_set))
+        if request is not None:
+            attach_access_context(request, AccessContext.from_user(user))
+        return user, None
+
+    @classmethod
+    def get_key_set(cls):
+        if cls.key_set is None:
+            cls.key_set = JWTKeySet.from_settings()
+        return cls.key_set
+
+    @staticmethod
+    def is_jwt(access_token):
+        return access_token.count('.') == 2
+
+    def verify(self, access_token, key_set):
+        try:
+            header = jwt.get_unverified_header(access_token)
+            key = key_set.get_key(header.get('kid'))
+            if key is None:
+                raise exceptions.AuthenticationFailed("Invalid Token")
+            return jwt.decode(
+                access_token,
+                key,
+                algorithms=settings.JWT_ALGORITHMS,
+                audience=settings.JWT_AUDIENCE,
+                issuer=settings.JWT_ISSUER,
+                leeway=settings.JWT_LEEWAY,
+                options={"require": ["exp"], "verify_aud": settings.JWT_AUDIENCE is not None},
+            )
+        except jwt.ExpiredSignatureError:
+            raise exceptions.AuthenticationFailed("Token has expired")
+        except jwt.InvalidTokenError:
+            raise exceptions.AuthenticationFailed("Invalid Token")
+
+    def get_user_from_claims(self, claims):
+        try:
+            # claims are coerced here so a malformed one fails authentication rather than a later lookup
+            role = claims[settings.JWT_ROLE_CLAIM]
+            user = User(
+                id=int(claims[settings.JWT_USER_ID_CLAIM]),
+                role=int(role) if role is not None else None,
+                customer_id=int(claims[settings.JWT_CUSTOMER_CLAIM]),
+                email=claims.get('email'),
+                status=claims.get('status', 'active'),
+            )
+        except (KeyError, TypeError, ValueError):
+            raise exceptions.AuthenticationFailed("Token is missing identity claims")
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed("User is inactive")
+        return user
     
 
 #************************************************************************************************
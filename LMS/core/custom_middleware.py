@@ -1,37 +1,143 @@
-import threading
 import time
-from django.http import HttpResponseServerError
-from django.http import HttpResponseForbidden
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
 
-from core.custom_mixins import SuperAdminMixin
+from core.deadline import DeadlineExceeded, RequestDeadline, is_query_canceled
+from core.metrics import registry
+from core.query_budget import QueryBudgetExceeded, QueryRecorder, get_view_budget, logger as query_budget_logger
 
 
 class TimeoutMiddleware:
+    """
+    Gives every request a deadline (settings.REQUEST_TIMEOUT seconds, or the view class'
+    `request_timeout` attribute; None disables it) and enforces it on the database work
+    the request does, see core.deadline.RequestDeadline. Runs in the request thread.
+    """
     def __init__(self, get_response):
         self.get_response = get_response
 
     def __call__(self, request):
-        # Define a function to be run in a separate thread
-        def process_request():
-            # Call the get_response function to handle the request
-            self.response = self.get_response(request)
-
-        # Create a thread to execute the request processing function
-        request_thread = threading.Thread(target=process_request)
-        request_thread.start()
-
-        # Set the timeout threshold (in seconds)
-        timeout_threshold = 20
-
-        # Wait for the request processing to finish or until timeout
-        request_thread.join(timeout=timeout_threshold)
-
-        # Check if the request processing thread is still alive
-        if request_thread.is_alive():
-            # If the thread is still alive, it means the request has timed out
-            return HttpResponseServerError('Request timed out')
-
-        # If the thread has finished processing, return the captured response
-        return self.response
-    
-    
+        deadline = RequestDeadline(settings.REQUEST_TIMEOUT)
+        request.deadline = deadline
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(deadline))
+                response = self.get_response(request)
+        finally:
+            try:
+                deadline.reset(connections)
+            except Exception:
+                # the connection is unusable; Django discards it at the end of the request
+                pass
+        if deadline.tripped:
+            # the view may have caught the exception and answered with its own error response
+            return self.timeout_response()
+        return response
+
+    @staticmethod
+    def timeout_response():
+        return HttpResponse('Request timed out', status=DeadlineExceeded.status_code)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if view_class is not None and hasattr(view_class, 'request_timeout'):
+            request.deadline.timeout = view_class.request_timeout
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, DeadlineExceeded) or is_query_canceled(exception):
+            return self.timeout_response()
+        return None
+
+
+class QueryStats:
+    """execute_wrapper that counts the queries of a request and the time spent in them."""
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - started_at
+
+
+class MetricsMiddleware:
+    """
+    Records latency, ORM query count, database time and response size per view and method
+    into core.metrics.registry, which /lms/metrics exposes in Prometheus format.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        query_stats = QueryStats()
+        started_at = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(query_stats))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started_at
+
+        labels = (self.get_view_name(request), request.method)
+        registry.observe('lms_http_request_duration_seconds', labels, duration)
+        registry.observe('lms_db_queries_per_request', labels, query_stats.count)
+        registry.observe('lms_db_query_duration_seconds', labels, query_stats.duration)
+        if not response.streaming:
+            registry.observe('lms_http_response_size_bytes', labels, len(response.content))
+        registry.inc('lms_http_responses_total', labels + (str(response.status_code),))
+        registry.maybe_flush()
+        return response
+
+    @staticmethod
+    def get_view_name(request):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return 'unresolved'
+        view_func = resolver_match.func
+        view_class = getattr(view_func, 'view_class', None)
+        return (view_class or view_func).__name__
+
+
+class QueryBudgetMiddleware:
+    """
+    Checks every request against the query budget of its view (the view class'
+    `query_budget`/`query_repeat_limit` attributes, see core.query_budget) and flags N+1
+    patterns: the same SQL fingerprint running more than the repeat limit. Depending on
+    settings.QUERY_BUDGET_MODE violations are logged with the offending stack or raised.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = settings.QUERY_BUDGET_MODE
+        if mode == 'off':
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request.query_recorder = recorder
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        problems = recorder.violations()
+        if problems:
+            message = "{} {} ({}): {}".format(
+                request.method, request.path, MetricsMiddleware.get_view_name(request), "\n".join(problems)
+            )
+            if mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            query_budget_logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        recorder = getattr(request, 'query_recorder', None)
+        view_class = getattr(view_func, 'view_class', None)
+        if recorder is not None and view_class is not None:
+            recorder.budget, recorder.repeat_limit = get_view_budget(view_class, request.method)
@@ -1,5 +1,5 @@
 from rest_framework import permissions
-from backend.models.coremodels import UserRolePrivileges
+from core.access_context import get_access_context
 import json
 from core.constants import (
     super_admin_resources, 
@@ -40,10 +40,8 @@ class SuperAdminMixin:
 
     def has_super_admin_privileges(self, request):        
         # user_privileges = UserRolePrivileges.objects.filter(role=request.user.role)
-        user = request.data.get('user')
         print("super")
-        user_privileges = UserRolePrivileges.objects.filter(role= user['role']) # role= user.role
-        privileged_resources = {privilege.resource.id for privilege in user_privileges}
+        privileged_resources = get_access_context(request).resource_ids
         print(privileged_resources)        
         if super_admin_resources == privileged_resources:
             return True
@@ -56,10 +54,8 @@ class ClientAdminMixin:
     
     def has_client_admin_privileges(self, request):
         # user_privileges = UserRolePrivileges.objects.filter(role=request.user.role)
-        user = request.data.get('user')
         print("client admin")
-        user_privileges = UserRolePrivileges.objects.filter(role= user['role']) # role= user.role
-        privileged_resources = {privilege.resource.id for privilege in user_privileges}
+        privileged_resources = get_access_context(request).resource_ids
         if client_admin_resources == privileged_resources:
             return True
         # Check for specific client admin privileges
@@ -70,11 +66,7 @@ class ClientAdminMixin:
 class ClientMixin:
     
     def has_client_privileges(self, request):
-        user = request.data.get('user')
-        user_privileges = UserRolePrivileges.objects.filter(role= user['role']) # role= user.role
-        # user = request.user
-        # user_privileges = UserRolePrivileges.objects.filter(role= user.role)
-        privileged_resources = {privilege.resource.id for privilege in user_privileges}
+        privileged_resources = get_access_context(request).resource_ids
         if client_resources == privileged_resources:
             return True
         # Check for specific client privileges
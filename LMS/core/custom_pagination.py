@@ -0,0 +1,14 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class StatisticsPagination(PageNumberPagination):
+    """
+    ?page=<n>&page_size=<m> for course listings annotated with statistics. Views only apply
+    it when `page` is passed, so unpaginated clients keep receiving the full list.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def is_requested(self, request):
+        return self.page_query_param in request.query_params
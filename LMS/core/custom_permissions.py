@@ -1,7 +1,6 @@
 from rest_framework import permissions
-from backend.models.allmodels import CourseEnrollment, CourseRegisterRecord
+from core.access_context import get_access_context
 from core.custom_mixins import ClientAdminMixin, ClientMixin, SuperAdminMixin
-from backend.models.coremodels import UserRolePrivileges
 
 '''
 allowed_resources:
@@ -57,19 +56,17 @@ class CourseContentPermissions(permissions.BasePermission, SuperAdminMixin, Clie
             return True
         
         if request.method == 'GET':
-            user = request.data.get('user')
+            access_context = get_access_context(request)
             course_id = view.kwargs.get('course_id')
             content_id = request.query_params.get('content_id')
             list_mode = request.query_params.get('list', '').lower() == 'true'
             count_calculator = request.query_params.get('count_calculator', '').lower() == 'true'
             if content_id or not list_mode or not count_calculator:
-                is_actively_enrolled = CourseEnrollment.objects.filter(course=course_id, user=user['id'], active=True).exists()
-                if is_actively_enrolled:
+                if access_context.is_enrolled(course_id):
                     return True
                 
                 if self.has_client_admin_privileges(request):
-                    is_actively_registered = CourseRegisterRecord.objects.filter(course=course_id, customer=user['customer'], active=True).exists()
-                    if is_actively_registered:
+                    if access_context.is_registered(course_id):
                         return True
         return False
 
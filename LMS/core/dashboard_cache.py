@@ -0,0 +1,135 @@
+import time
+from urllib.parse import urlencode
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+# version scopes: GLOBAL covers the super admin dashboard, which reads every customer's data,
+# COURSES and customer:<id> together cover a client admin dashboard
+GLOBAL = 'global'
+COURSES = 'courses'
+
+
+def customer_scope(customer_id):
+    return f'customer:{customer_id}'
+
+
+class DashboardCache:
+    """
+    Response data cache for the dashboard views.
+
+    Entries are keyed by widget name and parameters and stamped with the version counters of
+    the scopes they depend on; writes bump the counters (see invalidate_dashboards), which
+    makes every entry stamped with an older version stale. A stale or expired entry is still
+    served while one request, holding a short cache lock, recomputes it, so a burst of
+    requests after an invalidation does not recompute the same widget in parallel. On a
+    miss there is nothing to serve, so the other requests wait briefly for the lock holder.
+
+    Counters live in the cache as well, so with several worker processes
+    settings.CACHES['default'] must be a shared backend (redis/memcached) for writes made
+    in one worker to reach the others.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def _version_key(scope):
+        return f'dashboard:version:{scope}'
+
+    def get_versions(self, scopes):
+        keys = [self._version_key(scope) for scope in scopes]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # start from the clock so a counter lost to eviction never repeats an old value
+                self.cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def bump(self, *scopes):
+        for scope in scopes:
+            key = self._version_key(scope)
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, time.time_ns(), timeout=None)
+
+    def get_or_compute(self, name, compute, customer_id=None, params=None):
+        """
+        Return compute()'s result for this widget, from the cache when it is current.
+        customer_id=None means a super admin widget that depends on all data.
+        """
+        scopes = [GLOBAL] if customer_id is None else [COURSES, customer_scope(customer_id)]
+        key = f'dashboard:{name}'
+        if customer_id is not None:
+            key += f':{customer_id}'
+        if params:
+            key += ':' + urlencode(sorted((k, str(v)) for k, v in params.items() if v is not None))
+
+        versions = self.get_versions(scopes)
+        entry = self.cache.get(key)
+        if entry is not None and entry['versions'] == versions and entry['fresh_until'] > time.time():
+            return entry['value']
+
+        lock_key = f'{key}:lock'
+        locked = self.cache.add(lock_key, 1, timeout=settings.DASHBOARD_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            # another request is already computing this entry
+            if entry is not None:
+                return entry['value']
+            entry = self._wait_for(key, lock_key, versions)
+            if entry is not None:
+                return entry['value']
+        try:
+            value = compute()
+            self.cache.set(
+                key,
+                {'value': value, 'versions': versions, 'fresh_until': time.time() + settings.DASHBOARD_CACHE_TTL},
+                timeout=settings.DASHBOARD_CACHE_TTL + settings.DASHBOARD_CACHE_STALE_TTL,
+            )
+        finally:
+            if locked:
+                self.cache.delete(lock_key)
+        return value
+
+    def _wait_for(self, key, lock_key, versions):
+        """
+        On a miss with nothing to serve, poll for the entry the lock holder is computing, for
+        at most DASHBOARD_CACHE_WAIT_TIMEOUT seconds. Returns None when the holder gave up or
+        took too long, and the caller computes the entry itself.
+        """
+        deadline = time.monotonic() + settings.DASHBOARD_CACHE_WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(settings.DASHBOARD_CACHE_POLL_INTERVAL)
+            entry = self.cache.get(key)
+            if entry is not None and entry['versions'] == versions:
+                return entry
+            if self.cache.get(lock_key) is None:
+                return entry
+        return None
+
+
+dashboard_cache = DashboardCache()
+
+
+def invalidate_dashboards(customer_ids=(), courses=False):
+    """
+    Mark dashboard entries affected by a write as stale once the current transaction commits.
+    Every write affects the super admin dashboard; courses=True affects all customers.
+    """
+    scopes = [GLOBAL]
+    if courses:
+        scopes.append(COURSES)
+    scopes.extend(customer_scope(customer_id) for customer_id in set(customer_ids) if customer_id is not None)
+    transaction.on_commit(lambda: dashboard_cache.bump(*scopes))
+
+
+def invalidate_dashboards_for_users(user_ids):
+    from backend.models.coremodels import User
+    customer_ids = User.objects.filter(id__in=set(user_ids)).values_list('customer_id', flat=True)
+    invalidate_dashboards(customer_ids=list(customer_ids))
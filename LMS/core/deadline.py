@@ -0,0 +1,93 @@
+import time
+from django.db import OperationalError
+from rest_framework import exceptions, status
+
+# SQLSTATE PostgreSQL reports when statement_timeout cancels a statement
+QUERY_CANCELED = '57014'
+
+
+class DeadlineExceeded(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Request timed out"
+    default_code = "request_timeout"
+
+
+def is_query_canceled(exception):
+    cause = getattr(exception, '__cause__', None)
+    return isinstance(exception, OperationalError) and getattr(cause, 'pgcode', None) == QUERY_CANCELED
+
+
+class RequestDeadline:
+    """
+    Time budget of a single request, enforced at the database.
+
+    Installed with connection.execute_wrapper() for the lifetime of the request. Every query
+    first checks the budget and raises DeadlineExceeded once it is spent, so no further
+    database work starts. On PostgreSQL the remaining budget is also pushed down as
+    statement_timeout, so a statement that is already running is cancelled by the server
+    (it raises OperationalError with SQLSTATE 57014). The setting is only re-armed when the
+    budget has shrunk by more than `granularity`, which keeps it to one SET for most requests.
+
+    Views commonly catch Exception and answer 500 themselves, so `tripped` records that the
+    deadline stopped database work; TimeoutMiddleware then answers 503 whatever the view did.
+    """
+
+    def __init__(self, timeout):
+        self.started_at = time.monotonic()
+        self.timeout = timeout
+        self.tripped = False
+        self._applied_ms = {}
+
+    @property
+    def granularity(self):
+        return max(1.0, self.timeout * 0.1)
+
+    @property
+    def remaining(self):
+        if self.timeout is None:
+            return None
+        return self.timeout - (time.monotonic() - self.started_at)
+
+    @property
+    def expired(self):
+        remaining = self.remaining
+        return remaining is not None and remaining <= 0
+
+    def check(self):
+        if self.expired:
+            self.tripped = True
+            raise DeadlineExceeded()
+
+    def __call__(self, execute, sql, params, many, context):
+        remaining = self.remaining
+        if remaining is not None:
+            if remaining <= 0:
+                self.tripped = True
+                raise DeadlineExceeded()
+            connection = context['connection']
+            if connection.vendor == 'postgresql':
+                self._apply_statement_timeout(connection, context['cursor'], remaining)
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            if is_query_canceled(e):
+                self.tripped = True
+            raise
+
+    def _apply_statement_timeout(self, connection, cursor, remaining):
+        remaining_ms = int(remaining * 1000)
+        applied_ms = self._applied_ms.get(connection.alias)
+        if applied_ms is not None and remaining_ms > applied_ms - self.granularity * 1000:
+            return
+        # raw DB-API cursor, so this statement does not re-enter the execute wrappers
+        cursor.cursor.execute("SET statement_timeout = %s", [max(remaining_ms, 1)])
+        self._applied_ms[connection.alias] = remaining_ms
+
+    def reset(self, connections):
+        """Restore the server default on connections that had statement_timeout set."""
+        for alias in self._applied_ms:
+            connection = connections[alias]
+            if connection.connection is not None and not connection.needs_rollback:
+                with connection.connection.cursor() as cursor:
+                    cursor.execute("RESET statement_timeout")
+        self._applied_ms.clear()
@@ -0,0 +1,70 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from rest_framework import exceptions, status
+
+
+class IdentityServiceUnavailable(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Identity service unavailable, try again later."
+    default_code = "identity_service_unavailable"
+
+
+class IdentityServiceClient:
+    """
+    Client for the identity microservice that resolves an access token to a username.
+
+    Keeps one keep-alive requests.Session per worker process with a bounded connection pool,
+    and always calls with (connect, read) timeouts so a slow identity service cannot pin workers.
+    """
+
+    def __init__(self, url=None, timeout=None, pool_size=None):
+        self.url = url or settings.IDENTITY_SERVICE_URL
+        self.timeout = timeout or settings.IDENTITY_SERVICE_TIMEOUT
+        self.pool_size = pool_size or settings.IDENTITY_SERVICE_POOL_SIZE
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def get_username(self, access_token):
+        """
+        Return the username owning access_token, or None when the identity service rejects it.
+        Raises IdentityServiceUnavailable for network errors and 5xx answers, which must not
+        be remembered as invalid tokens.
+        """
+        headers = {"Authorization": f"Bearer {access_token}"}
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise IdentityServiceUnavailable() from e
+
+        if response.status_code >= 500:
+            raise IdentityServiceUnavailable()
+        if response.status_code != 200:
+            return None
+        try:
+            user_data = response.json()
+        except ValueError:
+            return None
+        return user_data.get("username")
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+identity_client = IdentityServiceClient()
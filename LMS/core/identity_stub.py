@@ -0,0 +1,71 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class IdentityStubServer(ThreadingHTTPServer):
+    """
+    Offline stand-in for the identity microservice.
+
+    Answers GET <path> with {"username": ...} for tokens it knows and 401 for anything else,
+    which is the contract core.identity_client.IdentityServiceClient relies on.
+
+        server = IdentityStubServer(('127.0.0.1', 0), tokens={'token-1': 'john.doe@example.com'})
+        server.start()
+        ... settings.IDENTITY_SERVICE_URL = server.url ...
+        server.stop()
+    """
+    daemon_threads = True
+
+    def __init__(self, server_address, tokens=None, path='/api/get_user/'):
+        super().__init__(server_address, IdentityStubHandler)
+        self.tokens = dict(tokens or {})
+        self.path = path
+        self.request_count = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+class IdentityStubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.request_count += 1
+        if urlparse(self.path).path != self.server.path:
+            return self._respond(404, {"error": "not found"})
+
+        auth = (self.headers.get('Authorization') or '').split()
+        if len(auth) != 2 or auth[0].lower() != 'bearer':
+            return self._respond(401, {"error": "missing bearer token"})
+
+        username = self.server.tokens.get(auth[1])
+        if username is None:
+            return self._respond(401, {"error": "invalid token"})
+        return self._respond(200, {"username": username})
+
+    def _respond(self, status_code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,91 @@
+import json
+import logging
+import threading
+import time
+import jwt
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JWTKeySet:
+    """
+    Verification keys for locally checked access tokens.
+
+    Keys come from a JWKS document (JWT_JWKS_URL or JWT_JWKS_FILE), reloaded by a daemon
+    thread every JWT_JWKS_REFRESH_INTERVAL seconds, or from a static shared secret
+    (JWT_SIGNING_KEY) for HMAC-signed tokens. A failed reload keeps the previous keys.
+    Asymmetric JWKS keys need the optional `cryptography` package, as PyJWT does.
+    """
+
+    # early refreshes triggered by unknown key ids are spaced at least this far apart
+    min_refresh_gap = 30
+
+    def __init__(self, jwks_url=None, jwks_file=None, signing_key=None, refresh_interval=None):
+        self.jwks_url = jwks_url
+        self.jwks_file = jwks_file
+        self.signing_key = signing_key
+        self.refresh_interval = refresh_interval or 300
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            jwks_url=settings.JWT_JWKS_URL,
+            jwks_file=settings.JWT_JWKS_FILE,
+            signing_key=settings.JWT_SIGNING_KEY,
+            refresh_interval=settings.JWT_JWKS_REFRESH_INTERVAL,
+        )
+
+    @property
+    def is_configured(self):
+        return bool(self.signing_key or self.jwks_url or self.jwks_file)
+
+    def get_key(self, kid=None):
+        if self.signing_key:
+            return self.signing_key
+        self._ensure_started()
+        keys = self._keys
+        if kid is None and len(keys) == 1:
+            return next(iter(keys.values()))
+        key = keys.get(kid)
+        if key is None:
+            # unknown kid: the issuer may have rotated keys, refresh ahead of schedule
+            self._wake.set()
+        return key
+
+    def reload(self):
+        try:
+            if self.jwks_url:
+                response = requests.get(self.jwks_url, timeout=settings.IDENTITY_SERVICE_TIMEOUT)
+                response.raise_for_status()
+                document = response.json()
+            else:
+                with open(self.jwks_file) as jwks_file:
+                    document = json.load(jwks_file)
+            keys = {jwk.key_id: jwk.key for jwk in jwt.PyJWKSet.from_dict(document).keys}
+        except (requests.RequestException, OSError, ValueError, jwt.PyJWKError, jwt.PyJWKSetError) as e:
+            logger.warning("Could not reload JWT key set: %s", e)
+            return False
+        self._keys = keys
+        return True
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self.reload()
+                self._thread = threading.Thread(target=self._refresh_forever, name='jwt-key-set', daemon=True)
+                self._thread.start()
+
+    def _refresh_forever(self):
+        while True:
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+            self.reload()
+            time.sleep(self.min_refresh_gap)
@@ -0,0 +1,146 @@
+import glob
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from django.conf import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, math.inf)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, math.inf)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, math.inf)
+
+# name -> (help text, label names, buckets); buckets=None means a plain counter
+METRICS = {
+    'lms_http_request_duration_seconds': (
+        "Time spent handling a request.", ('view', 'method'), LATENCY_BUCKETS),
+    'lms_http_response_size_bytes': (
+        "Size of the response body.", ('view', 'method'), SIZE_BUCKETS),
+    'lms_db_queries_per_request': (
+        "Number of ORM queries run by a request.", ('view', 'method'), QUERY_COUNT_BUCKETS),
+    'lms_db_query_duration_seconds': (
+        "Time a request spent waiting on the database.", ('view', 'method'), LATENCY_BUCKETS),
+    'lms_http_responses_total': (
+        "Responses sent, by status code.", ('view', 'method', 'status'), None),
+}
+
+
+class MetricsRegistry:
+    """
+    In-process store for the request metrics above.
+
+    With METRICS_DIR set, each worker process periodically writes its values to
+    <METRICS_DIR>/metrics_<pid>.json and collect() sums the files of every worker, so one
+    scrape of /lms/metrics covers all gunicorn workers. The directory should be emptied when
+    the whole server is restarted, as with prometheus_client's multiprocess mode.
+    """
+
+    def __init__(self):
+        self._values = {name: {} for name in METRICS}
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][2]
+        with self._lock:
+            series = self._values[name]
+            key = tuple(labels)
+            if buckets is None:
+                series[key] = series.get(key, 0) + value
+            else:
+                entry = series.get(key)
+                if entry is None:
+                    entry = series[key] = [0] * len(buckets) + [0.0, 0]
+                for index, upper_bound in enumerate(buckets):
+                    if value <= upper_bound:
+                        entry[index] += 1
+                        break
+                entry[-2] += value
+                entry[-1] += 1
+
+    def inc(self, name, labels, amount=1):
+        self.observe(name, labels, amount)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: [[list(key), value if not isinstance(value, list) else list(value)] for key, value in series.items()]
+                for name, series in self._values.items()
+            }
+
+    def maybe_flush(self):
+        directory = settings.METRICS_DIR
+        if not directory or time.monotonic() - self._last_flush < settings.METRICS_FLUSH_INTERVAL:
+            return
+        self.flush(directory)
+
+    def flush(self, directory):
+        self._last_flush = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.metrics_', suffix='.tmp')
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump(self.snapshot(), tmp_file)
+        os.replace(tmp_path, os.path.join(directory, f'metrics_{os.getpid()}.json'))
+
+    def collect(self):
+        """Return {name: {labels: value}} summed over every worker process."""
+        directory = settings.METRICS_DIR
+        if not directory:
+            snapshots = [self.snapshot()]
+        else:
+            self.flush(directory)
+            snapshots = []
+            for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+                try:
+                    with open(path) as metrics_file:
+                        snapshots.append(json.load(metrics_file))
+                except (OSError, ValueError):
+                    continue
+
+        merged = {name: {} for name in METRICS}
+        for snapshot in snapshots:
+            for name, series in snapshot.items():
+                if name not in merged:
+                    continue
+                for key, value in series:
+                    key = tuple(key)
+                    current = merged[name].get(key)
+                    if current is None:
+                        merged[name][key] = value
+                    elif isinstance(value, list):
+                        merged[name][key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        merged[name][key] = current + value
+        return merged
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for name, series in self.collect().items():
+            help_text, label_names, buckets = METRICS[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {'counter' if buckets is None else 'histogram'}")
+            for key, value in sorted(series.items()):
+                labels = _format_labels(zip(label_names, key))
+                if buckets is None:
+                    lines.append(f"{name}{{{labels}}} {value}")
+                    continue
+                cumulative = 0
+                for upper_bound, count in zip(buckets, value):
+                    cumulative += count
+                    le = '+Inf' if upper_bound == math.inf else repr(upper_bound)
+                    lines.append(f"{name}_bucket{{{labels},le=\"{le}\"}} {cumulative}")
+                lines.append(f"{name}_sum{{{labels}}} {value[-2]}")
+                lines.append(f"{name}_count{{{labels}}} {value[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(pairs):
+    return ",".join(
+        '{}="{}"'.format(label, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for label, value in pairs
+    )
+
+
+registry = MetricsRegistry()
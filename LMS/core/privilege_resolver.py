@@ -0,0 +1,39 @@
+from django.conf import settings
+from backend.models.coremodels import UserRolePrivileges
+from core.ttl_cache import TTLCache
+
+
+class PrivilegeResolver:
+    """
+    Resolves the set of resource ids a role has privileges on.
+
+    Results are cached in process for PRIVILEGE_CACHE_TTL seconds, and dropped
+    as soon as UserRolePrivileges or Resources rows are saved or deleted
+    (see the receivers in backend/models/coremodels.py).
+    """
+
+    def __init__(self, ttl=None):
+        if ttl is None:
+            ttl = getattr(settings, 'PRIVILEGE_CACHE_TTL', 300)
+        self._cache = TTLCache(ttl=ttl)
+
+    def get_resource_ids(self, role_id):
+        if role_id is None:
+            return frozenset()
+        role_id = int(role_id)
+        resource_ids = self._cache.get(role_id)
+        if resource_ids is None:
+            resource_ids = frozenset(
+                UserRolePrivileges.objects.filter(role=role_id).values_list('resource_id', flat=True)
+            )
+            self._cache.set(role_id, resource_ids)
+        return resource_ids
+
+    def invalidate(self, role_id=None):
+        if role_id is None:
+            self._cache.clear()
+        else:
+            self._cache.delete(role_id)
+
+
+privilege_resolver = PrivilegeResolver()
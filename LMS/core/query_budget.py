@@ -0,0 +1,87 @@
+import logging
+import re
+import traceback
+from collections import Counter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_WHITESPACE = re.compile(r'\s+')
+# middleware and execute_wrapper frames are noise in the reported stacks
+_SKIPPED_MODULES = ('core/custom_middleware.py', 'core/deadline.py', 'core/query_budget.py')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def fingerprint(sql):
+    """Normalize SQL so the same statement with different values or IN-list sizes matches."""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _application_stack():
+    base_dir = str(settings.BASE_DIR)
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and 'site-packages' not in frame.filename
+        and not frame.filename.endswith(_SKIPPED_MODULES)
+    ]
+    return ''.join(traceback.format_list(frames))
+
+
+class QueryRecorder:
+    """
+    execute_wrapper that counts the queries of a request per SQL fingerprint. A stack trace
+    is captured the first time a fingerprint repeats and when the budget is first exceeded,
+    so reports point at the loop or the call that caused them.
+    """
+
+    def __init__(self, budget=None, repeat_limit=None):
+        self.budget = budget
+        self.repeat_limit = repeat_limit
+        self.count = 0
+        self.fingerprints = Counter()
+        self.stacks = {}
+        self.over_budget_stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        key = fingerprint(sql)
+        self.fingerprints[key] += 1
+        if self.fingerprints[key] == 2:
+            self.stacks[key] = _application_stack()
+        if self.budget is not None and self.count == self.budget + 1:
+            self.over_budget_stack = _application_stack()
+        return execute(sql, params, many, context)
+
+    def violations(self):
+        problems = []
+        if self.budget is not None and self.count > self.budget:
+            problems.append(
+                f"ran {self.count} queries, budget is {self.budget}; first query over budget from:\n"
+                f"{self.over_budget_stack}"
+            )
+        if self.repeat_limit is not None:
+            for key, repeats in self.fingerprints.items():
+                if repeats > self.repeat_limit:
+                    problems.append(
+                        f"ran the same query {repeats} times (possible N+1): {key}\n"
+                        f"repeated from:\n{self.stacks.get(key, '')}"
+                    )
+        return problems
+
+
+def get_view_budget(view_class, method):
+    budget = getattr(view_class, 'query_budget', settings.QUERY_BUDGET_DEFAULT)
+    if isinstance(budget, dict):
+        budget = budget.get(method, settings.QUERY_BUDGET_DEFAULT)
+    repeat_limit = getattr(view_class, 'query_repeat_limit', settings.QUERY_REPEAT_LIMIT)
+    return budget, repeat_limit